@@ -1,21 +1,79 @@
+from core.constants import ADMIN_COMMENTS_PER_PAGE
+from core.paginator import get_page_window
+from core.utils import search_posts
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.forms.models import BaseInlineFormSet
 from django.utils.safestring import mark_safe
 
-from .models import Category, Comment, Location, Post
+from .models import Category, Comment, ImageJob, Location, Post
 
 admin.site.empty_value_display = "Не задано"
 
 
+class AuthorFilter(admin.SimpleListFilter):
+    """Фильтр по имени автора вместо списка всех пользователей.
+
+    Имя вводится в поле с подсказками из autocomplete админки, поэтому
+    боковая панель не зависит от количества пользователей.
+    """
+
+    title = "автору"
+    parameter_name = "author"
+    template = "admin/blog/author_filter.html"
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(author__username=self.value())
+        return queryset
+
+    def choices(self, changelist):
+        yield {
+            "selected": self.value() is not None,
+            "value": self.value() or "",
+            "query_parts": [
+                (name, value) for name, value in changelist.params.items()
+                if name != self.parameter_name
+            ],
+            "reset_query_string": changelist.get_query_string(
+                remove=[self.parameter_name]
+            ),
+        }
+
+
 class BlogAdmin(admin.ModelAdmin):
     """Общий интерфейс админ-панели блог."""
 
     list_editable = ("is_published",)
 
 
+class CommentPageFormSet(BaseInlineFormSet):
+    """Формы комментариев только одной страницы, а не всего поста."""
+
+    page_number = None
+    page_query = ""
+
+    def get_queryset(self):
+        if not hasattr(self, "_queryset"):
+            paginator = Paginator(self.queryset, ADMIN_COMMENTS_PER_PAGE)
+            self.page = paginator.get_page(self.page_number)
+            self.page.page_window = get_page_window(self.page)
+            self._queryset = self.page.object_list
+        return self._queryset
+
+
 class CommentAdmin(admin.TabularInline):
     """Интерфейс для комментариев."""
 
     model = Comment
+    formset = CommentPageFormSet
+    template = "admin/blog/comment_inline.html"
     readonly_fields = (
         "text",
         "author",
@@ -23,6 +81,18 @@ class CommentAdmin(admin.TabularInline):
     )
     extra = 0
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("author")
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        # Номер страницы передаётся в адресе формы поста, поэтому при
+        # сохранении формы разбираются на той же странице.
+        query = request.GET.copy()
+        formset.page_number = query.pop("comments_page", [None])[-1]
+        formset.page_query = query.urlencode() + "&" if query else ""
+        return formset
+
 
 @admin.register(Post)
 class PostAdmin(BlogAdmin):
@@ -42,11 +112,12 @@ class PostAdmin(BlogAdmin):
         "title",
         "text",
     )
+    list_select_related = ("author",)
     list_filter = (
         "is_published",
         "category",
         "location",
-        "author",
+        AuthorFilter,
     )
     fields = (
         "is_published",
@@ -60,17 +131,25 @@ class PostAdmin(BlogAdmin):
         "image",
     )
     readonly_fields = ("get_post_img",)
+    autocomplete_fields = (
+        "author",
+        "location",
+        "category",
+    )
     save_on_top = True
 
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по индексу FTS5 вместо LIKE '%...%' по search_fields;
+        # search_fields нужны, чтобы changelist показывал строку поиска.
+        if not search_term:
+            return queryset, False
+        return search_posts(queryset, search_term), False
+
     @admin.display(description="Изображение")
     def get_post_img(self, obj):
         if obj.image:
             return mark_safe(f"<img src='{obj.image.url}' width=50")
 
-    @admin.display(description="Комментарии")
-    def comment_count(self, obj):
-        return obj.comments.count()
-
 
 @admin.register(Category)
 class CategoryAdmin(BlogAdmin):
@@ -82,6 +161,10 @@ class CategoryAdmin(BlogAdmin):
         "created_at",
         "slug",
     )
+    search_fields = (
+        "title",
+        "slug",
+    )
 
 
 @admin.register(Location)
@@ -93,3 +176,44 @@ class LocationAdmin(BlogAdmin):
         "is_published",
         "created_at",
     )
+    search_fields = ("name",)
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    """Очередь обработки изображений: только просмотр."""
+
+    list_display = (
+        "source",
+        "post",
+        "status",
+        "attempts",
+        "created_at",
+        "finished_at",
+    )
+    list_filter = ("status",)
+    list_select_related = ("post",)
+    readonly_fields = (
+        "post",
+        "source",
+        "status",
+        "attempts",
+        "error",
+        "created_at",
+        "started_at",
+        "finished_at",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        # Глубина очереди видна над списком задач.
+        extra_context = {
+            **(extra_context or {}),
+            "status_counts": [
+                (ImageJob.Status(status).label, count)
+                for status, count in ImageJob.objects.status_counts().items()
+            ],
+        }
+        return super().changelist_view(request, extra_context)
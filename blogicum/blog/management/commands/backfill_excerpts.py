@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = "Заполнить отрывки текста для карточек постов."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Пересчитать отрывки всех постов, а не только пустые.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Количество постов в одном запросе UPDATE.",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="База данных с постами.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        posts = Post.objects.using(options["database"])
+        query_set = posts.only("pk", "text", "updated_at")
+        if not options["all"]:
+            query_set = query_set.filter(excerpt="")
+        updated = 0
+        batch = []
+        for post in query_set.iterator(chunk_size=batch_size):
+            post.excerpt = post.make_excerpt()
+            post.updated_at = timezone.now()
+            batch.append(post)
+            if len(batch) == batch_size:
+                posts.bulk_update(batch, ["excerpt", "updated_at"])
+                updated += len(batch)
+                batch = []
+        posts.bulk_update(batch, ["excerpt", "updated_at"])
+        updated += len(batch)
+        self.stdout.write(
+            self.style.SUCCESS(f"Обновлено отрывков: {updated}.")
+        )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import ImageJob, Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Поставить в очередь создание копий уже загруженных изображений "
+        "постов; копии создаёт process_image_jobs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Пересоздать копии всех изображений, а не только новых.",
+        )
+
+    def handle(self, *args, **options):
+        query_set = Post.objects.exclude(image="").only(
+            "pk", "image", "image_variants"
+        )
+        queued = 0
+        for post in query_set.iterator():
+            if (
+                not options["all"]
+                and post.image_variants.get("source") == post.image.name
+            ):
+                continue
+            ImageJob.objects.enqueue(post)
+            queued += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Поставлено в очередь изображений: {queued}."
+        ))
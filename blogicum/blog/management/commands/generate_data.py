@@ -0,0 +1,224 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from blog.models import Category, Comment, Location, Post, User
+
+WORDS = (
+    "город", "утро", "дорога", "кофе", "поезд", "море", "книга", "вечер",
+    "горы", "парк", "дождь", "солнце", "друзья", "музей", "река", "лес",
+    "осень", "зима", "весна", "лето", "прогулка", "ужин", "рынок", "мост",
+    "улица", "площадь", "вокзал", "история", "фото", "заметка", "путь",
+    "небо", "ветер", "дом", "окно", "сад", "озеро", "пляж", "тропа", "чай",
+)
+
+
+def zipf_cum_weights(count, exponent):
+    """Вернуть накопленные веса закона Ципфа для count элементов.
+
+    Элемент ранга r выбирается с вероятностью ~ 1 / r ** exponent:
+    несколько «горячих» авторов и постов получают большую часть записей.
+    """
+    return list(
+        accumulate(1 / rank ** exponent for rank in range(1, count + 1))
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Сгенерировать пользователей, категории, местоположения, посты и "
+        "комментарии с неравномерным распределением для замеров. "
+        "Результат определяется параметром --seed."
+    )
+
+    def add_arguments(self, parser):
+        for name, default, help_text in (
+            ("users", 1000, "Количество пользователей."),
+            ("categories", 20, "Количество категорий."),
+            ("locations", 50, "Количество местоположений."),
+            ("posts", 10_000, "Количество постов."),
+            ("comments", 30_000, "Количество комментариев."),
+        ):
+            parser.add_argument(
+                f"--{name}", type=int, default=default, help=help_text,
+            )
+        parser.add_argument(
+            "--seed", type=int, default=0,
+            help="Зерно генератора; входит в имена пользователей и slug.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Количество строк в одном запросе INSERT.",
+        )
+        parser.add_argument(
+            "--skew", type=float, default=1.1,
+            help="Показатель закона Ципфа для авторов и постов.",
+        )
+        parser.add_argument(
+            "--days", type=int, default=365,
+            help="За сколько дней распределены даты публикации.",
+        )
+        parser.add_argument(
+            "--scheduled", type=float, default=0.05,
+            help="Доля отложенных постов с датой в будущем.",
+        )
+        parser.add_argument(
+            "--unpublished", type=float, default=0.1,
+            help="Доля снятых с публикации категорий и постов.",
+        )
+
+    def bulk_create(self, model, objs, return_ids=True):
+        """Создать объекты пачками и вернуть их идентификаторы."""
+        last_pk = (
+            model.objects.order_by("-pk").values_list("pk", flat=True).first()
+            or 0
+        )
+        batch = []
+        for obj in objs:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                model.objects.bulk_create(batch)
+                batch = []
+        model.objects.bulk_create(batch)
+        if not return_ids:
+            return None
+        # SQLite не возвращает ключи из bulk_create: новые строки — это
+        # строки с ключом больше прежнего максимального.
+        return list(
+            model.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+    def text(self, low, high):
+        return " ".join(self.rng.choices(WORDS, k=self.rng.randint(low, high)))
+
+    def skewed(self, ids):
+        """Вернуть функцию выбора id с перемешанными «горячими» записями."""
+        ids = list(ids)
+        self.rng.shuffle(ids)
+        cum_weights = zipf_cum_weights(len(ids), self.skew)
+        return lambda: self.rng.choices(ids, cum_weights=cum_weights)[0]
+
+    def generate_users(self, count):
+        return self.bulk_create(User, (
+            User(
+                username=f"{self.prefix}-user-{number}",
+                first_name=self.rng.choice(WORDS).capitalize(),
+                password="!",
+            )
+            for number in range(count)
+        ))
+
+    def generate_categories(self, count):
+        categories = [
+            Category(
+                title=f"Категория {number}",
+                description=self.text(5, 20),
+                slug=f"{self.prefix}-category-{number}",
+                is_published=self.rng.random() >= self.unpublished,
+            )
+            for number in range(count)
+        ]
+        ids = self.bulk_create(Category, categories)
+        published = {
+            pk for pk, category in zip(ids, categories)
+            if category.is_published
+        }
+        return ids, published
+
+    def generate_locations(self, count):
+        return self.bulk_create(Location, (
+            Location(name=f"Место {number}") for number in range(count)
+        ))
+
+    def generate_posts(self, count, authors, categories, published,
+                       locations):
+        pick_author = self.skewed(authors)
+        period = self.days * 24 * 60 * 60
+
+        def posts():
+            for number in range(count):
+                if self.rng.random() < self.scheduled:
+                    shift = self.rng.randint(1, period)
+                else:
+                    shift = -self.rng.randint(0, period)
+                post = Post(
+                    title=f"Пост {number}: {self.text(1, 4)}",
+                    text=self.text(20, 200),
+                    pub_date=self.now + timedelta(seconds=shift),
+                    author_id=pick_author(),
+                    category_id=self.rng.choice(categories),
+                    location_id=(
+                        self.rng.choice(locations)
+                        if locations and self.rng.random() < 0.7 else None
+                    ),
+                    is_published=self.rng.random() >= self.unpublished,
+                )
+                # Производные поля заполняет Post.save, а bulk_create его
+                # не вызывает.
+                post.excerpt = post.make_excerpt()
+                post.is_visible = (
+                    post.is_published
+                    and post.category_id in published
+                    and shift <= 0
+                )
+                yield post
+
+        return self.bulk_create(Post, posts())
+
+    def generate_comments(self, count, authors, posts):
+        pick_post = self.skewed(posts)
+        self.bulk_create(Comment, (
+            Comment(
+                text=self.text(3, 40),
+                post_id=pick_post(),
+                author_id=self.rng.choice(authors),
+            )
+            for _ in range(count)
+        ), return_ids=False)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.prefix = f"s{options['seed']}"
+        self.batch_size = options["batch_size"]
+        self.skew = options["skew"]
+        self.days = options["days"]
+        self.scheduled = options["scheduled"]
+        self.unpublished = options["unpublished"]
+        # Даты отсчитываются от момента запуска, чтобы отложенные посты
+        # оставались в будущем; смещения зависят только от зерна.
+        self.now = timezone.now()
+
+        generated = User.objects.filter(username__startswith=f"{self.prefix}-")
+        if generated.exists():
+            raise CommandError(
+                f"Данные с зерном {options['seed']} уже созданы; "
+                "укажите другое значение --seed."
+            )
+        if options["posts"] and not (
+            options["users"] and options["categories"]
+        ):
+            raise CommandError("Для постов нужны пользователи и категории.")
+        if options["comments"] and not options["posts"]:
+            raise CommandError("Для комментариев нужны посты.")
+
+        with transaction.atomic():
+            users = self.generate_users(options["users"])
+            categories, published = self.generate_categories(
+                options["categories"]
+            )
+            locations = self.generate_locations(options["locations"])
+            posts = self.generate_posts(
+                options["posts"], users, categories, published, locations
+            )
+            self.generate_comments(options["comments"], users, posts)
+        self.stdout.write(self.style.SUCCESS(
+            f"Создано: пользователей {len(users)}, категорий "
+            f"{len(categories)}, местоположений {len(locations)}, постов "
+            f"{len(posts)}, комментариев {options['comments']}."
+        ))
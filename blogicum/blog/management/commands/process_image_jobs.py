@@ -0,0 +1,141 @@
+import time
+from collections import Counter
+from concurrent.futures import (FIRST_COMPLETED, Future, ProcessPoolExecutor,
+                                wait)
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from blog.models import ImageJob
+from core.images import make_image_variants
+
+
+class InlineExecutor:
+    """Исполнитель без пула: задачи выполняются в этом же процессе."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, func, *args):
+        future = Future()
+        try:
+            future.set_result(func(*args))
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+
+class Command(BaseCommand):
+    help = (
+        "Создать уменьшенные копии изображений постов из очереди задач "
+        "в пуле процессов. С --loop работает как фоновый процесс."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int,
+            default=getattr(settings, "IMAGE_JOB_WORKERS", 2),
+            help="Количество процессов; 0 — обрабатывать в этом процессе.",
+        )
+        parser.add_argument(
+            "--queue-depth", type=int,
+            default=getattr(settings, "IMAGE_JOB_QUEUE_DEPTH", 8),
+            help="Сколько задач одновременно взято в работу.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Не завершаться, а проверять очередь периодически.",
+        )
+        parser.add_argument(
+            "--interval", type=float, default=5,
+            help="Пауза между проверками пустой очереди, секунды.",
+        )
+        parser.add_argument(
+            "--stale-after", type=float, default=600,
+            help=(
+                "Через сколько секунд выполняемая задача считается "
+                "брошенной и возвращается в очередь."
+            ),
+        )
+        parser.add_argument(
+            "--status",
+            action="store_true",
+            help="Показать количество задач по статусам и завершиться.",
+        )
+
+    def write_status(self):
+        counts = ImageJob.objects.status_counts()
+        self.stdout.write(", ".join(
+            f"{ImageJob.Status(status).label}: {count}"
+            for status, count in counts.items()
+        ))
+
+    def finish(self, job, future):
+        try:
+            image_variants = future.result()
+        except Exception as error:
+            job.fail(error)
+            self.stderr.write(f"Задача {job.pk} ({job.source}): {error}")
+            return False
+        job.complete(image_variants)
+        return True
+
+    def get_executor(self, workers):
+        if not workers:
+            return InlineExecutor()
+        # Обработчики работают только с файлами; соединения с базой не
+        # должны достаться дочерним процессам.
+        connections.close_all()
+        return ProcessPoolExecutor(workers, initializer=django.setup)
+
+    def process(self, executor, queue_depth, loop, interval):
+        """Выполнять задачи очереди, держа в работе до queue_depth."""
+        in_flight = {}
+        while True:
+            for job in ImageJob.objects.claim(queue_depth - len(in_flight)):
+                future = executor.submit(make_image_variants, job.source)
+                in_flight[future] = job
+            if not in_flight:
+                if not loop:
+                    return
+                time.sleep(interval)
+                continue
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                self.counts[self.finish(in_flight.pop(future), future)] += 1
+
+    def handle(self, *args, **options):
+        if options["status"]:
+            self.write_status()
+            return
+        requeued = ImageJob.objects.requeue_stale(
+            timezone.now() - timedelta(seconds=options["stale_after"])
+        )
+        if requeued:
+            self.stdout.write(f"Возвращено в очередь задач: {requeued}.")
+        self.counts = Counter()
+        try:
+            with self.get_executor(options["workers"]) as executor:
+                self.process(
+                    executor,
+                    max(options["queue_depth"], 1),
+                    options["loop"],
+                    options["interval"],
+                )
+        except KeyboardInterrupt:
+            # Взятые задачи вернёт в очередь следующий запуск
+            # (--stale-after).
+            self.stdout.write("Остановлено.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Обработано изображений: {self.counts[True]}, "
+            f"с ошибками: {self.counts[False]}."
+        ))
+        self.write_status()
@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Открыть читателям отложенные посты, время публикации которых "
+        "наступило. С --loop работает как фоновый процесс."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Не завершаться, а проверять очередь периодически.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=30,
+            help="Наибольшая пауза между проверками, секунды.",
+        )
+
+    def publish_due(self):
+        """Открыть наступившие публикации и вернуть их количество."""
+        now = timezone.now()
+        published = Post.objects.due_for_publication(now).refresh_visibility(
+            now
+        )
+        if published:
+            self.stdout.write(f"Опубликовано постов: {published}.")
+        return published
+
+    def seconds_to_next(self, interval):
+        """Вернуть паузу до ближайшей отложенной публикации."""
+        next_pub_date = (
+            Post.objects.filter(
+                is_visible=False,
+                is_published=True,
+                pub_date__gt=timezone.now(),
+            )
+            .order_by("pub_date")
+            .values_list("pub_date", flat=True)
+            .first()
+        )
+        if next_pub_date is None:
+            return interval
+        delay = (next_pub_date - timezone.now()).total_seconds()
+        return min(max(delay, 0), interval)
+
+    def handle(self, *args, **options):
+        if not options["loop"]:
+            self.publish_due()
+            return
+        interval = options["interval"]
+        try:
+            while True:
+                self.publish_due()
+                time.sleep(self.seconds_to_next(interval))
+        except KeyboardInterrupt:
+            self.stdout.write("Остановлено.")
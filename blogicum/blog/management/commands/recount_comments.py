@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитать сохранённое количество комментариев у постов. "
+        "Нужно после loaddata и прямых правок таблицы комментариев."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только показать посты с расхождением, не исправляя их.",
+        )
+
+    def handle(self, *args, **options):
+        drifted = Post.objects.annotate(actual=Count("comments")).exclude(
+            comment_count=F("actual")
+        )
+        if options["check"]:
+            rows = drifted.values_list("pk", "comment_count", "actual")
+            for pk, stored, actual in rows:
+                self.stdout.write(
+                    f"Пост {pk}: сохранено {stored}, фактически {actual}"
+                )
+            return
+        # Переписываем только разошедшиеся посты: update_comment_count()
+        # сдвигает updated_at, а с ним сбрасывается кеш карточек и ETag.
+        updated = Post.objects.filter(
+            pk__in=drifted.values("pk")
+        ).update_comment_count()
+        self.stdout.write(
+            self.style.SUCCESS(f"Пересчитано постов: {updated}.")
+        )
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.16 on 2026-10-17 04:32
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_post_is_visible'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Версия поста для кеша: меняется и при изменении его комментариев, категории, местоположения и автора.', verbose_name='Изменено'),
+        ),
+    ]
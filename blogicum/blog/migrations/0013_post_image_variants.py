@@ -0,0 +1,25 @@
+# Generated by Django 3.2.16 on 2026-10-17 05:03
+
+from blog.search_sql import restore_search_triggers
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_post_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            migrations.RunPython.noop, restore_search_triggers
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Размеры изображения и его уменьшенных копий для srcset; заполняется при загрузке и командой backfill_image_variants.', verbose_name='Копии изображения'),
+        ),
+        migrations.RunPython(
+            restore_search_triggers, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.16 on 2026-10-17 05:09
+
+import core.storage
+from blog.search_sql import restore_search_triggers
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_imagejob'),
+        ('core', '0001_media_blob'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            migrations.RunPython.noop, restore_search_triggers
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=core.storage.HashedMediaStorage(), upload_to='images', verbose_name='Изображение'),
+        ),
+        migrations.RunPython(
+            restore_search_triggers, migrations.RunPython.noop
+        ),
+    ]
@@ -1,9 +1,47 @@
-from core.models import BaseModel, BaseTitle
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from core.cache import (INDEX_SCOPE, author_scope, category_scope,
+                        invalidate_on_commit)
+from core.constants import EXCERPT_WORDS
+from core.images import delete_image_variants
+from core.models import BaseModel, BaseTitle, MediaBlob
+from core.signals import post_visibility_changed
+from core.storage import hashed_storage, take_upload
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.conf import settings
+from django.db import connections, models, router, transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.text import Truncator
 
 User = get_user_model()
 
+# Размер пачки идентификаторов в одном запросе UPDATE ... WHERE id IN.
+VISIBILITY_BATCH_SIZE = 500
+
+# Пока флаг установлен, сигналы не меняют счётчик комментариев поста:
+# массовые операции пересчитывают его сами одним запросом.
+_comment_count_suspended = ContextVar(
+    "comment_count_suspended", default=False
+)
+
+
+@contextmanager
+def comment_count_suspended():
+    """Отключить пообъектное обновление счётчика комментариев."""
+    token = _comment_count_suspended.set(True)
+    try:
+        yield
+    finally:
+        _comment_count_suspended.reset(token)
+
+
+def is_comment_count_suspended():
+    """Вернуть True, если счётчик комментариев обновляется массово."""
+    return _comment_count_suspended.get()
+
 
 class Location(BaseModel):
     """Местоположение."""
@@ -46,11 +84,83 @@ class Category(BaseModel, BaseTitle):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    """Запросы к публикациям."""
+
+    def visible(self):
+        """Вернуть посты, видимые читателям."""
+        return self.filter(is_visible=True)
+
+    def due_for_publication(self, now=None):
+        """Вернуть отложенные посты, время публикации которых наступило."""
+        return self.filter(
+            is_visible=False,
+            is_published=True,
+            category__is_published=True,
+            pub_date__lte=now or timezone.now(),
+        )
+
+    def refresh_visibility(self, now=None):
+        """Пересчитать флаг is_visible у постов выборки.
+
+        Для постов, чья видимость изменилась, отправляется сигнал
+        post_visibility_changed. Вернуть количество изменённых постов.
+        """
+        visible = Q(
+            is_published=True,
+            category__is_published=True,
+            pub_date__lte=now or timezone.now(),
+        )
+        posts = self.model._default_manager.db_manager(self.db)
+        shown = self.filter(visible, is_visible=False)
+        hidden = self.filter(is_visible=True).exclude(
+            pk__in=posts.filter(visible).values("pk")
+        )
+        changed = 0
+        for query_set, is_visible in ((shown, True), (hidden, False)):
+            post_ids = list(query_set.values_list("pk", flat=True))
+            for start in range(0, len(post_ids), VISIBILITY_BATCH_SIZE):
+                batch = post_ids[start:start + VISIBILITY_BATCH_SIZE]
+                posts.filter(pk__in=batch).update(
+                    is_visible=is_visible, updated_at=timezone.now()
+                )
+            if post_ids:
+                post_visibility_changed.send(
+                    sender=self.model, post_ids=post_ids, visible=is_visible
+                )
+            changed += len(post_ids)
+        return changed
+
+    def update_comment_count(self):
+        """Пересчитать сохранённое количество комментариев."""
+        comment_count = (
+            Comment.objects.filter(post=OuterRef("pk"))
+            .order_by()
+            .values("post")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return self.update(
+            comment_count=Coalesce(Subquery(comment_count), 0),
+            updated_at=timezone.now(),
+        )
+
+    def touch(self):
+        """Отметить посты изменёнными, чтобы сбросить их кеш."""
+        return self.update(updated_at=timezone.now())
+
+
 class Post(BaseModel, BaseTitle):
     """Публикация."""
     text = models.TextField(
         verbose_name="Текст",
     )
+    excerpt = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name="Отрывок",
+        help_text="Начало текста для карточки поста; заполняется само.",
+    )
     pub_date = models.DateTimeField(
         verbose_name="Дата и время публикации",
         help_text=(
@@ -79,19 +189,259 @@ class Post(BaseModel, BaseTitle):
     )
     image = models.ImageField(
         upload_to="images",
+        storage=hashed_storage,
         blank=True,
         verbose_name="Изображение",
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name="Копии изображения",
+        help_text=(
+            "Размеры изображения и его уменьшенных копий для srcset; "
+            "заполняется при загрузке и командой backfill_image_variants."
+        ),
+    )
+    is_visible = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name="Виден читателям",
+        help_text=(
+            "Пост и его категория опубликованы, и время публикации "
+            "наступило; обновляется при сохранении и командой "
+            "publish_scheduled."
+        ),
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Комментарии",
+    )
+    updated_at = models.DateTimeField(
+        default=timezone.now,
+        editable=False,
+        verbose_name="Изменено",
+        help_text=(
+            "Версия поста для кеша: меняется и при изменении его "
+            "комментариев, категории, местоположения и автора."
+        ),
+    )
+
+    objects = PostQuerySet.as_manager()
+
+    # Поля, которые save() вычисляет, и поля, от которых они зависят.
+    DERIVED_FIELDS = {
+        "excerpt": ("text",),
+        "is_visible": (
+            "is_published", "pub_date", "category", "category_id"
+        ),
+    }
 
     class Meta:
         verbose_name = "публикация"
         verbose_name_plural = "Публикации"
         default_related_name = "posts"
         ordering = ("-pub_date",)
+        indexes = (
+            # Главная лента: видимые посты от новых к старым.
+            models.Index(
+                fields=("-pub_date", "-id"),
+                condition=models.Q(is_visible=True),
+                name="post_visible_feed_idx",
+            ),
+            # Лента категории.
+            models.Index(
+                fields=("category", "-pub_date", "-id"),
+                condition=models.Q(is_visible=True),
+                name="post_category_feed_idx",
+            ),
+            # Страница автора: владелец видит и неопубликованные посты.
+            models.Index(
+                fields=("author", "-pub_date", "-id"),
+                name="post_author_feed_idx",
+            ),
+            # Очередь отложенных публикаций для publish_scheduled.
+            models.Index(
+                fields=("pub_date",),
+                condition=models.Q(is_visible=False, is_published=True),
+                name="post_scheduled_idx",
+            ),
+        )
 
     def __str__(self):
         return self.title
 
+    def make_excerpt(self):
+        """Вернуть отрывок текста для карточки поста."""
+        return Truncator(self.text).words(EXCERPT_WORDS, truncate=" …")
+
+    def set_image_variants(self, image_variants):
+        """Записать описание копий изображения и удалить прежние копии."""
+        delete_image_variants(self.image_variants)
+        self.image_variants = image_variants
+        # UPDATE в обход save(): остальные поля поста не менялись, но
+        # новая версия сбрасывает закешированную карточку.
+        self.updated_at = timezone.now()
+        Post.objects.filter(pk=self.pk).update(
+            image_variants=self.image_variants, updated_at=self.updated_at
+        )
+        # update() не отправляет сигналы, поэтому ленты с карточкой поста
+        # сбрасываются здесь.
+        slug, username = Post.objects.filter(pk=self.pk).values_list(
+            "category__slug", "author__username"
+        ).first() or (None, None)
+        scopes = [INDEX_SCOPE]
+        if slug is not None:
+            scopes.append(category_scope(slug))
+        if username is not None:
+            scopes.append(author_scope(username))
+        invalidate_on_commit(*scopes)
+
+    @property
+    def image_srcset(self):
+        """Вернуть значение srcset из копий и оригинала изображения.
+
+        Пустая строка, если копий нет или они сделаны для другого файла.
+        """
+        variants = self.image_variants
+        if not self.image or variants.get("source") != self.image.name:
+            return ""
+        storage = self.image.storage
+        candidates = [
+            *((variant["name"], variant["width"])
+              for variant in variants["variants"]),
+            (self.image.name, variants["width"]),
+        ]
+        return ", ".join(
+            f"{storage.url(name)} {width}w" for name, width in candidates
+        )
+
+    def check_visibility(self, now=None):
+        """Вернуть True, если пост должен быть виден читателям."""
+        return bool(
+            self.is_published
+            and self.category_id is not None
+            and self.category.is_published
+            and self.pub_date <= (now or timezone.now())
+        )
+
+    def save(self, *args, **kwargs):
+        was_visible = self.is_visible
+        self.excerpt = self.make_excerpt()
+        self.is_visible = self.check_visibility()
+        # Не auto_now: у auto_now-поля нет значения по умолчанию, и
+        # loaddata не может загрузить посты из старых фикстур.
+        self.updated_at = timezone.now()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = {*update_fields, "updated_at"}
+            for field, sources in self.DERIVED_FIELDS.items():
+                if update_fields.intersection(sources):
+                    update_fields.add(field)
+            kwargs["update_fields"] = update_fields
+        # Счётчик комментариев меняется запросами UPDATE в обход
+        # экземпляра, поэтому при обновлении поста его не перезаписываем
+        # устаревшим значением из памяти.
+        if (
+            not self._state.adding
+            and self.pk is not None
+            and not kwargs.get("force_insert")
+            and kwargs.get("update_fields") is None
+        ):
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "comment_count"
+            ]
+        try:
+            super().save(*args, **kwargs)
+        except Exception:
+            # Загруженный файл сразу получил ссылку; если пост не
+            # сохранился, ссылку снимаем.
+            using = kwargs.get("using") or router.db_for_write(type(self))
+            if (
+                take_upload(self.image.name)
+                and not transaction.get_connection(using).needs_rollback
+            ):
+                MediaBlob.objects.db_manager(using).release(
+                    self.image.name, self.image.storage
+                )
+            raise
+        if self.is_visible != was_visible:
+            post_visibility_changed.send(
+                sender=type(self), post_ids=[self.pk], visible=self.is_visible
+            )
+
+
+class SearchDocumentField(models.TextField):
+    """Скрытый столбец FTS5-таблицы, названный как сама таблица.
+
+    Условие MATCH по нему ищет сразу по всем столбцам индекса.
+    """
+
+
+@SearchDocumentField.register_lookup
+class Match(models.Lookup):
+    """Полнотекстовое условие FTS5: document__match=запрос."""
+
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *rhs_params]
+
+
+class PostSearch(models.Model):
+    """Полнотекстовый индекс постов.
+
+    Виртуальная таблица FTS5 над blog_post создаётся миграцией только в
+    SQLite и обновляется триггерами базы данных, поэтому за ней следят и
+    bulk_create, и update(). Столбец rank — релевантность (bm25), чем
+    меньше, тем выше.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="rowid",
+        related_name="search_entry",
+    )
+    title = models.TextField()
+    text = models.TextField()
+    document = SearchDocumentField(db_column="blog_post_search")
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "blog_post_search"
+
+
+class CommentQuerySet(models.QuerySet):
+    """Запросы к комментариям.
+
+    Массовые операции обходят сигналы модели (bulk_create) или вызывали бы
+    их для каждой строки (delete), поэтому счётчик комментариев
+    затронутых постов пересчитывается одним запросом.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        post_ids = {obj.post_id for obj in objs}
+        Post.objects.filter(pk__in=post_ids).update_comment_count()
+        return objs
+
+    def delete(self):
+        post_ids = set(self.values_list("post_id", flat=True))
+        with comment_count_suspended():
+            result = super().delete()
+        Post.objects.filter(pk__in=post_ids).update_comment_count()
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
 
 class Comment(models.Model):
     """Комментарий."""
@@ -114,11 +464,174 @@ class Comment(models.Model):
         verbose_name="Добавлено",
     )
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         verbose_name = "комментарий"
         verbose_name_plural = "Комментарии"
         default_related_name = "comments"
         ordering = ("created_at",)
+        indexes = (
+            models.Index(
+                fields=("post", "created_at"),
+                name="comment_post_created_idx",
+            ),
+        )
 
     def __str__(self):
         return f"Комментарий пользователя {self.author} {self.created_at}"
+
+
+class ImageJobQuerySet(models.QuerySet):
+    """Очередь задач создания копий изображений постов."""
+
+    def enqueue(self, post):
+        """Поставить в очередь изображение поста вместо прежней задачи."""
+        self.filter(post=post, status=ImageJob.Status.PENDING).delete()
+        return self.create(post=post, source=post.image.name)
+
+    def claim(self, limit):
+        """Взять в работу до limit ожидающих задач и вернуть их.
+
+        Задачи переводятся в работу условным UPDATE по статусу, а
+        возвращаются только те, что получили метку started_at этого вызова:
+        задачу, которую между выборкой и UPDATE успел взять другой
+        обработчик, UPDATE пропустит. Где база умеет SKIP LOCKED, выборка
+        к тому же не ждёт чужих блокировок.
+        """
+        started_at = timezone.now()
+        with transaction.atomic(using=self.db):
+            pending = self.filter(status=ImageJob.Status.PENDING).order_by(
+                "pk"
+            )
+            if connections[self.db].features.has_select_for_update_skip_locked:
+                pending = pending.select_for_update(skip_locked=True)
+            ids = list(pending.values_list("pk", flat=True)[:limit])
+            self.filter(pk__in=ids, status=ImageJob.Status.PENDING).update(
+                status=ImageJob.Status.RUNNING,
+                started_at=started_at,
+                attempts=models.F("attempts") + 1,
+            )
+        return list(
+            self.filter(
+                pk__in=ids,
+                status=ImageJob.Status.RUNNING,
+                started_at=started_at,
+            ).order_by("pk")
+        )
+
+    def requeue_stale(self, started_before):
+        """Вернуть в очередь задачи, брошенные остановленным обработчиком."""
+        return self.filter(
+            status=ImageJob.Status.RUNNING, started_at__lt=started_before
+        ).update(status=ImageJob.Status.PENDING)
+
+    def status_counts(self):
+        """Вернуть количество задач по статусам."""
+        counts = dict(
+            self.order_by().values_list("status").annotate(Count("pk"))
+        )
+        return {
+            status: counts.get(status, 0) for status in ImageJob.Status.values
+        }
+
+
+class ImageJob(models.Model):
+    """Задача создания уменьшенных копий изображения поста.
+
+    Задачи ставятся при загрузке изображения и выполняются командой
+    process_image_jobs; пока копий нет, страницы показывают оригинал.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "В очереди"
+        RUNNING = "running", "Выполняется"
+        DONE = "done", "Готово"
+        FAILED = "failed", "Ошибка"
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name="Пост",
+    )
+    source = models.CharField(
+        max_length=255,
+        verbose_name="Изображение",
+        help_text="Файл, для которого создаются копии.",
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name="Статус",
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Попыток",
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name="Ошибка",
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Добавлено",
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Начато",
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Завершено",
+    )
+
+    objects = ImageJobQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "обработка изображения"
+        verbose_name_plural = "Обработка изображений"
+        default_related_name = "image_jobs"
+        ordering = ("-pk",)
+        indexes = (
+            # Выборка очереди обработчиком.
+            models.Index(
+                fields=("status", "id"),
+                condition=models.Q(status="pending"),
+                name="imagejob_pending_idx",
+            ),
+        )
+
+    def __str__(self):
+        return f"{self.source} ({self.get_status_display()})"
+
+    def complete(self, image_variants):
+        """Записать копии в пост, если его изображение не сменилось."""
+        post = (
+            Post.objects.filter(pk=self.post_id)
+            .only("pk", "image", "image_variants")
+            .first()
+        )
+        if post is None or post.image.name != self.source:
+            # Пока задача выполнялась, изображение заменили или удалили:
+            # копии устарели, новое изображение обработает своя задача.
+            delete_image_variants(image_variants)
+        else:
+            post.set_image_variants({"source": self.source, **image_variants})
+        self.status = self.Status.DONE
+        self.error = ""
+        self.finished_at = timezone.now()
+        self.save(update_fields=("status", "error", "finished_at"))
+
+    def fail(self, error):
+        """Вернуть задачу в очередь или, если попытки кончились, закрыть."""
+        max_attempts = getattr(settings, "IMAGE_JOB_MAX_ATTEMPTS", 3)
+        self.status = (
+            self.Status.FAILED if self.attempts >= max_attempts
+            else self.Status.PENDING
+        )
+        self.error = str(error)
+        self.finished_at = timezone.now()
+        self.save(update_fields=("status", "error", "finished_at"))
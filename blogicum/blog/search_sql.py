@@ -0,0 +1,92 @@
+"""SQL триггеров полнотекстового индекса постов (см. PostSearch).
+
+SQLite удаляет триггеры вместе с таблицей blog_post, а миграции,
+меняющие её столбцы, пересоздают таблицу: после таких миграций триггеры
+нужно создать заново функцией restore_search_triggers. Если миграция
+этого не сделала, триггеры после migrate восстановит
+ensure_search_triggers.
+"""
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+SEARCH_TABLE = "blog_post_search"
+SEARCH_TRIGGERS = (
+    "blog_post_search_insert",
+    "blog_post_search_delete",
+    "blog_post_search_update",
+)
+
+CREATE_SEARCH_TRIGGERS = (
+    """
+    CREATE TRIGGER blog_post_search_insert AFTER INSERT ON blog_post BEGIN
+        INSERT INTO blog_post_search(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_post_search_delete AFTER DELETE ON blog_post BEGIN
+        INSERT INTO blog_post_search(blog_post_search, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_post_search_update
+    AFTER UPDATE OF title, text ON blog_post BEGIN
+        INSERT INTO blog_post_search(blog_post_search, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO blog_post_search(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+)
+
+DROP_SEARCH_TRIGGERS = (
+    "DROP TRIGGER IF EXISTS blog_post_search_insert",
+    "DROP TRIGGER IF EXISTS blog_post_search_delete",
+    "DROP TRIGGER IF EXISTS blog_post_search_update",
+)
+
+REBUILD_SEARCH_INDEX = (
+    "INSERT INTO blog_post_search(blog_post_search) VALUES ('rebuild')"
+)
+
+
+def restore_search_triggers(apps, schema_editor):
+    """Пересоздать триггеры индекса и перестроить его (для RunPython)."""
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in (
+            *DROP_SEARCH_TRIGGERS,
+            *CREATE_SEARCH_TRIGGERS,
+            REBUILD_SEARCH_INDEX,
+        ):
+            schema_editor.execute(sql)
+
+
+def ensure_search_triggers(using=DEFAULT_DB_ALIAS, **kwargs):
+    """Восстановить триггеры индекса, если их нет (обработчик post_migrate).
+
+    Страхует от миграции, которая пересоздала blog_post и не вызвала
+    restore_search_triggers: без триггеров новые посты не попадают в
+    поиск. Если все триггеры на месте, выполняется один запрос.
+    """
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+            [SEARCH_TABLE, *SEARCH_TRIGGERS],
+        )
+        existing = {name for name, in cursor.fetchall()}
+        # До миграции 0012 индекса нет, и восстанавливать нечего.
+        if SEARCH_TABLE not in existing or existing.issuperset(
+            SEARCH_TRIGGERS
+        ):
+            return
+        with transaction.atomic(using=using):
+            for sql in (
+                *DROP_SEARCH_TRIGGERS,
+                *CREATE_SEARCH_TRIGGERS,
+                REBUILD_SEARCH_INDEX,
+            ):
+                cursor.execute(sql)
@@ -0,0 +1,249 @@
+from core.cache import (INDEX_SCOPE, author_scope, category_scope,
+                        invalidate_on_commit)
+from core.images import delete_image_variants
+from core.models import MediaBlob
+from core.storage import take_upload
+from core.paginator import invalidate_post_counts
+from core.signals import post_visibility_changed
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import (VISIBILITY_BATCH_SIZE, Category, Comment, Location, Post,
+                     User, is_comment_count_suspended)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw=False, **kwargs):
+    """Увеличить счётчик комментариев поста."""
+    if created and not raw and not is_comment_count_suspended():
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F("comment_count") + 1,
+            updated_at=timezone.now(),
+        )
+
+
+@receiver(post_save, sender=Comment)
+def touch_commented_post(sender, instance, created, raw=False, **kwargs):
+    """Обновить версию поста при правке комментария."""
+    if not created and not raw:
+        Post.objects.filter(pk=instance.post_id).touch()
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """Уменьшить счётчик комментариев поста."""
+    if not is_comment_count_suspended():
+        Post.objects.filter(
+            pk=instance.post_id, comment_count__gt=0
+        ).update(
+            comment_count=F("comment_count") - 1,
+            updated_at=timezone.now(),
+        )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def reset_post_counts(sender, **kwargs):
+    """Сбросить закешированные количества постов в лентах.
+
+    Комментарии на количество постов не влияют, поэтому их изменения
+    кеш не сбрасывают.
+    """
+    invalidate_post_counts()
+
+
+@receiver(post_visibility_changed)
+def reset_post_counts_on_visibility(sender, **kwargs):
+    """Сбросить количества постов, когда посты появились или скрылись."""
+    invalidate_post_counts()
+
+
+@receiver(post_save, sender=Category)
+def refresh_category_visibility(sender, instance, raw=False, **kwargs):
+    """Пересчитать видимость постов категории."""
+    if not raw:
+        Post.objects.filter(category=instance).refresh_visibility()
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_category_posts(sender, instance, raw=False, **kwargs):
+    """Обновить версию постов, в карточках которых показана категория."""
+    if not raw:
+        Post.objects.filter(category=instance).touch()
+
+
+@receiver(post_save, sender=Location)
+@receiver(pre_delete, sender=Location)
+def touch_location_posts(sender, instance, raw=False, **kwargs):
+    """Обновить версию постов, в карточках которых показано место."""
+    if not raw:
+        Post.objects.filter(location=instance).touch()
+
+
+@receiver(post_save, sender=User)
+def touch_author_posts(sender, instance, raw=False, update_fields=None,
+                       **kwargs):
+    """Обновить версию постов, где показано имя пользователя.
+
+    Это посты пользователя и посты с его комментариями.
+    """
+    if raw or (update_fields is not None and "username" not in update_fields):
+        return
+    Post.objects.filter(
+        Q(author=instance) | Q(comments__author=instance)
+    ).touch()
+
+
+@receiver(post_delete, sender=Category)
+def hide_uncategorized_posts(sender, **kwargs):
+    """Скрыть посты, оставшиеся без категории после её удаления."""
+    Post.objects.filter(category__isnull=True).refresh_visibility()
+
+
+def _category_scopes(**filters):
+    """Вернуть области кеша лент категорий, выбранных фильтром."""
+    slugs = (
+        Category.objects.filter(**filters)
+        .values_list("slug", flat=True)
+        .distinct()
+    )
+    return [category_scope(slug) for slug in slugs]
+
+
+def _author_scopes(**filters):
+    """Вернуть области кеша страниц авторов, выбранных фильтром."""
+    usernames = (
+        User.objects.filter(**filters)
+        .values_list("username", flat=True)
+        .distinct()
+    )
+    return [author_scope(username) for username in usernames]
+
+
+@receiver(pre_save, sender=Post)
+def remember_saved_post(sender, instance, raw=False, **kwargs):
+    """Запомнить категорию и изображение поста до сохранения."""
+    if instance.pk is not None and not raw:
+        instance._saved_category_id, instance._saved_image = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list("category_id", "image")
+            .first()
+        ) or (None, "")
+
+
+@receiver(post_save, sender=Post)
+def count_image_references(sender, instance, raw=False, **kwargs):
+    """Учесть ссылку на новое изображение поста и снять с прежнего.
+
+    Ссылку загруженного файла уже учло хранилище; здесь учитываются
+    посты, которым имя файла присвоили без загрузки.
+    """
+    if raw:
+        return
+    saved_image = getattr(instance, "_saved_image", "")
+    name = instance.image.name
+    uploaded = take_upload(name)
+    if name == saved_image:
+        if uploaded:
+            # Загружено то же содержимое: хранилище учло вторую ссылку
+            # того же поста.
+            MediaBlob.objects.release(name, instance.image.storage)
+    else:
+        if name:
+            MediaBlob.objects.cover(
+                name, Post.objects.filter(image=name).count()
+            )
+        MediaBlob.objects.release(saved_image, instance.image.storage)
+        instance._saved_image = name
+
+
+@receiver(post_delete, sender=Post)
+def release_post_image(sender, instance, **kwargs):
+    """Снять ссылку с изображения удалённого поста и удалить его копии."""
+    MediaBlob.objects.release(instance.image.name, instance.image.storage)
+    variants = instance.image_variants
+    transaction.on_commit(lambda: delete_image_variants(variants))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def purge_post_pages(sender, instance, **kwargs):
+    """Сбросить кеш главной, лент категорий поста и страницы автора."""
+    category_ids = {
+        instance.category_id, getattr(instance, "_saved_category_id", None)
+    }
+    category_ids.discard(None)
+    invalidate_on_commit(
+        INDEX_SCOPE,
+        *_category_scopes(pk__in=category_ids),
+        *_author_scopes(pk=instance.author_id),
+    )
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_slug(sender, instance, raw=False, **kwargs):
+    """Запомнить адрес категории до сохранения."""
+    if instance.pk is not None and not raw:
+        instance._saved_slug = (
+            Category.objects.filter(pk=instance.pk)
+            .values_list("slug", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def purge_category_pages(sender, instance, **kwargs):
+    """Сбросить кеш главной, ленты категории и страниц её авторов."""
+    scopes = [INDEX_SCOPE, category_scope(instance.slug)]
+    saved_slug = getattr(instance, "_saved_slug", None)
+    if saved_slug:
+        scopes.append(category_scope(saved_slug))
+    invalidate_on_commit(*scopes, *_author_scopes(authors__category=instance))
+
+
+@receiver(post_save, sender=Location)
+@receiver(pre_delete, sender=Location)
+def purge_location_pages(sender, instance, **kwargs):
+    """Сбросить кеш лент, где показаны посты с этим местоположением."""
+    invalidate_on_commit(
+        INDEX_SCOPE,
+        *_category_scopes(posts__location=instance),
+        *_author_scopes(authors__location=instance),
+    )
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_comment_pages(sender, instance, created=True, **kwargs):
+    """Сбросить кеш лент, где показан счётчик комментариев поста."""
+    if created:
+        invalidate_on_commit(
+            INDEX_SCOPE,
+            *_category_scopes(posts=instance.post_id),
+            *_author_scopes(authors=instance.post_id),
+        )
+
+
+@receiver(post_save, sender=User)
+def purge_author_pages(sender, instance, **kwargs):
+    """Сбросить кеш страницы пользователя."""
+    invalidate_on_commit(author_scope(instance.username))
+
+
+@receiver(post_visibility_changed)
+def purge_visibility_pages(sender, post_ids, **kwargs):
+    """Сбросить кеш лент, где посты появились или скрылись."""
+    scopes = [INDEX_SCOPE]
+    for start in range(0, len(post_ids), VISIBILITY_BATCH_SIZE):
+        batch = post_ids[start:start + VISIBILITY_BATCH_SIZE]
+        scopes.extend(_category_scopes(posts__in=batch))
+        scopes.extend(_author_scopes(authors__in=batch))
+    invalidate_on_commit(*scopes)
@@ -25,6 +25,12 @@ urlpatterns = [
         views.UserPostsListView.as_view(),
         name="profile",
     ),
+    # Поиск по постам.
+    path(
+        "search/",
+        views.PostSearchView.as_view(),
+        name="search",
+    ),
     # Пост.
     path(
         "posts/<int:pk>/",
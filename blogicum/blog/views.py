@@ -1,48 +1,62 @@
-from core.mixins import CommentMixinView, MixinListView
-from core.utils import get_all_posts_queryset, get_post_data
+from core.constants import POST_COUNT_APPROXIMATE_ABOVE, POST_ON_MAIN
+from core.cache import author_scope, category_scope
+from core.mixins import (AnonymousPageCacheMixin, CommentMixinView,
+                         ConditionalGetMixin, ImageVariantsMixin,
+                         MixinListView, OwnerObjectMixin)
+from core.paginator import CachedCountPaginator, get_page_window
+from core.utils import (get_all_posts_queryset, get_post_cards_queryset,
+                        get_post_data, search_posts)
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Prefetch, Q
-from django.shortcuts import get_object_or_404, redirect
+from django.db.models import Q
+from django.http import Http404
+from django.shortcuts import get_object_or_404
 from django.urls import reverse, reverse_lazy
-from django.utils import timezone
-from django.utils.timezone import now
+from django.utils.http import urlencode
 from django.views.generic import (CreateView, DeleteView, DetailView, ListView,
                                   UpdateView)
 
 from .forms import CommentEditForm, PostEditForm, UserEditForm
 from .models import Category, Comment, Post, User
 
+# Поля пользователя, которые показывает страница профиля.
+PROFILE_FIELDS = (
+    "username", "first_name", "last_name", "date_joined", "is_staff",
+)
 
-class MainPostListView(MixinListView, ListView):
+
+class MainPostListView(
+    ConditionalGetMixin, AnonymousPageCacheMixin, MixinListView, ListView
+):
     """Главная страница со списком постов. """
 
     model = Post
     template_name = "blog/index.html"
+    count_approximate_above = POST_COUNT_APPROXIMATE_ABOVE
 
     def get_queryset(self):
-        query_set = get_all_posts_queryset().filter(
-            pub_date__lte=timezone.now(),
-            is_published=True,
-            category__is_published=True,
-        )
+        query_set = get_post_cards_queryset().filter(is_visible=True)
         return query_set
 
 
-class CategoryPostListView(MixinListView, ListView):
+class CategoryPostListView(
+    ConditionalGetMixin, AnonymousPageCacheMixin, MixinListView, ListView
+):
     """Страница со списком постов выбранной категории."""
 
     template_name = "blog/category.html"
     category = None
 
+    def get_page_cache_scopes(self):
+        return (category_scope(self.kwargs["category_slug"]),)
+
     def get_queryset(self):
         slug = self.kwargs["category_slug"]
         self.category = get_object_or_404(
             Category, slug=slug, is_published=True
         )
-        query_set = get_all_posts_queryset().filter(
+        query_set = get_post_cards_queryset().filter(
             category=self.category,
-            pub_date__lte=timezone.now(),
-            is_published=True
+            is_visible=True,
         )
         return query_set
 
@@ -52,26 +66,36 @@ class CategoryPostListView(MixinListView, ListView):
         return context
 
 
-class UserPostsListView(MainPostListView):
+class UserPostsListView(
+    ConditionalGetMixin, AnonymousPageCacheMixin, MixinListView, ListView
+):
     """Страница со списком постов пользователя."""
 
     template_name = "blog/profile.html"
+    count_approximate_above = POST_COUNT_APPROXIMATE_ABOVE
     author = None
 
+    def get_page_cache_scopes(self):
+        return (author_scope(self.kwargs["username"]),)
+
     def get_queryset(self):
-        username = self.kwargs["username"]
+        # Пользователь и его посты выбираются отдельными запросами, а не
+        # через prefetch: prefetch загрузил бы в память все посты автора,
+        # а курсорной пагинации нужен queryset, к которому LIMIT и условие
+        # по ключу (pub_date, id) применяются в базе данных.
         self.author = get_object_or_404(
-            User.objects.prefetch_related(Prefetch(
-                'authors',
-                queryset=get_all_posts_queryset().filter(
-                    Q(author__username=self.request.user.username)
-                    | Q(is_published=True)
-                    & Q(category__is_published=True)
-                    & Q(pub_date__lte=timezone.now())
-                )
-            )), username=username
+            User.objects.only(*PROFILE_FIELDS),
+            username=self.kwargs["username"],
         )
-        return self.author.authors.all()
+        query_set = get_post_cards_queryset().filter(author=self.author)
+        if self.author.pk != self.request.user.pk:
+            query_set = query_set.filter(is_visible=True)
+        return query_set
+
+    def get_count_cache_key(self):
+        # Владелец страницы видит и свои неопубликованные посты.
+        is_owner = self.request.user.username == self.kwargs["username"]
+        return f"{super().get_count_cache_key()}:owner={is_owner}"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -79,27 +103,79 @@ class UserPostsListView(MainPostListView):
         return context
 
 
-class PostDetailView(DetailView):
-    """Страница выбранного поста."""
+class PostSearchView(ListView):
+    """Поиск по опубликованным постам, по убыванию релевантности."""
+
+    template_name = "blog/search.html"
+    paginate_by = POST_ON_MAIN
+    paginator_class = CachedCountPaginator
+
+    def get_query(self):
+        return self.request.GET.get("q", "").strip()
+
+    def get_queryset(self):
+        return search_posts(
+            get_post_cards_queryset().filter(is_visible=True),
+            self.get_query(),
+        )
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        return self.paginator_class(
+            queryset,
+            per_page,
+            approximate_above=POST_COUNT_APPROXIMATE_ABOVE,
+            **kwargs,
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator, page, object_list, is_paginated = (
+            super().paginate_queryset(queryset, page_size)
+        )
+        page.page_window = get_page_window(page)
+        return paginator, page, object_list, is_paginated
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.get_query()
+        context["query"] = query
+        context["page_query"] = urlencode({"q": query}) + "&"
+        return context
+
+
+class PostDetailView(ConditionalGetMixin, DetailView):
+    """Страница выбранного поста.
+
+    Пост выбирается одним запросом вместе с проверкой видимости, и он же
+    служит валидатором условного запроса; комментарии — вторым запросом.
+    """
 
     model = Post
     template_name = "blog/detail.html"
     post_data = None
 
     def get_queryset(self):
-        self.post_data = get_object_or_404(
-            Post, (
-                Q(is_published=True)
-                & Q(category__is_published=True)
-                & Q(pub_date__lte=timezone.now())
-                | Q(author__username=self.request.user.username)
-            ), pk=self.kwargs[self.pk_url_kwarg],
-        )
+        # Автор видит свой пост и до публикации.
         return get_all_posts_queryset().filter(
-            Q(is_published=True)
-            | Q(author__username=self.request.user.username)
+            Q(is_visible=True) | Q(author_id=self.request.user.pk)
         )
 
+    def get_object(self, queryset=None):
+        if self.post_data is None:
+            self.post_data = super().get_object(queryset)
+        return self.post_data
+
+    def get_etag_parts(self):
+        # Версия поста меняется и при изменении его комментариев,
+        # категории, местоположения и авторов (см. blog.signals).
+        try:
+            post = self.get_object()
+        except Http404:
+            return None
+        return [post.pk, post.updated_at.isoformat()]
+
+    def get_last_modified(self):
+        return self.post_data.updated_at
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["form"] = CommentEditForm()
@@ -108,16 +184,6 @@ class PostDetailView(DetailView):
         )
         return context
 
-    def check_post_data(self):
-        """Вернуть результат проверки поста."""
-        return all(
-            (
-                self.post_data.is_published,
-                self.post_data.pub_date <= now(),
-                self.post_data.category.is_published,
-            )
-        )
-
 
 class UserProfileUpdateView(LoginRequiredMixin, UpdateView):
     """Обновление профиля пользователя."""
@@ -134,7 +200,7 @@ class UserProfileUpdateView(LoginRequiredMixin, UpdateView):
         return reverse("blog:profile", kwargs={"username": username})
 
 
-class PostCreateView(LoginRequiredMixin, CreateView):
+class PostCreateView(ImageVariantsMixin, LoginRequiredMixin, CreateView):
     """Создание поста."""
 
     model = Post
@@ -150,40 +216,26 @@ class PostCreateView(LoginRequiredMixin, CreateView):
         return reverse("blog:profile", kwargs={"username": username})
 
 
-class PostUpdateView(LoginRequiredMixin, UpdateView):
+class PostUpdateView(
+    OwnerObjectMixin, ImageVariantsMixin, LoginRequiredMixin, UpdateView
+):
     """Редактирование поста."""
 
     model = Post
     form_class = PostEditForm
     template_name = "blog/create.html"
 
-    def dispatch(self, request, *args, **kwargs):
-        if self.get_object().author != request.user:
-            return redirect(
-                "blog:post_detail",
-                pk=self.kwargs[self.pk_url_kwarg]
-            )
-        return super().dispatch(request, *args, **kwargs)
-
     def get_success_url(self):
         pk = self.kwargs[self.pk_url_kwarg]
         return reverse("blog:post_detail", kwargs={"pk": pk})
 
 
-class PostDeleteView(LoginRequiredMixin, DeleteView):
+class PostDeleteView(OwnerObjectMixin, LoginRequiredMixin, DeleteView):
     """Удаление поста."""
 
     model = Post
     template_name = "blog/create.html"
 
-    def dispatch(self, request, *args, **kwargs):
-        if self.get_object().author != request.user:
-            return redirect(
-                "blog:post_detail",
-                pk=self.kwargs[self.pk_url_kwarg]
-            )
-        return super().dispatch(request, *args, **kwargs)
-
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["form"] = PostEditForm(instance=self.object)
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -34,6 +35,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "core.middleware.QueryBudgetMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -66,8 +68,45 @@ TEMPLATES = [
     },
 ]
 
+# Разбирать все шаблоны при старте воркера (см. settings_production.py).
+TEMPLATE_PRECOMPILE = False
+
+# Бюджеты запросов к базе по имени URL, включая запросы сессии и
+# пользователя (см. core.middleware.QueryBudgetMiddleware).
+QUERY_BUDGETS = {
+    "blog:index": 5,
+    "blog:category_posts": 5,
+    "blog:profile": 5,
+    "blog:post_detail": 4,
+}
+
+# Превышение бюджета: False — запись в лог, True — исключение (в тестах).
+QUERY_BUDGET_RAISE = False
+
+# Как часто процесс записывает свою статистику запросов в общий кеш для
+# сводки /stats/queries/, секунды.
+QUERY_STATS_FLUSH_SECONDS = 10
+
+# Очередь создания копий изображений (см. process_image_jobs):
+# процессов-обработчиков, задач в работе одновременно и попыток задачи.
+IMAGE_JOB_WORKERS = 2
+IMAGE_JOB_QUEUE_DEPTH = 8
+IMAGE_JOB_MAX_ATTEMPTS = 3
+
 WSGI_APPLICATION = "blogicum.wsgi.application"
 
+# Общий для всех процессов кеш: поколения областей (core.cache) должны
+# меняться сразу во всех воркерах и после команд вроде
+# publish_scheduled, а кеш в памяти процесса видит только свой процесс.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        # Каталог можно сменить переменной окружения (например, в тестах).
+        "LOCATION": os.environ.get("BLOGICUM_CACHE_DIR", BASE_DIR / "cache"),
+        "OPTIONS": {"MAX_ENTRIES": 10_000},
+    }
+}
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
@@ -110,6 +149,18 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 MEDIA_ROOT = BASE_DIR / "media"
 
+MEDIA_URL = "/media/"
+
+# Отдача загруженных файлов (см. core.media): "file" — ответом с файлом,
+# который WSGI-сервер передаёт ядру через sendfile; "x-accel-redirect" —
+# через внутренний location nginx с префиксом MEDIA_ACCEL_REDIRECT_PREFIX;
+# "x-sendfile" — заголовком для Apache или lighttpd; None — только при
+# DEBUG, через django.views.static.serve.
+MEDIA_SERVE_MODE = "file"
+MEDIA_ACCEL_REDIRECT_PREFIX = "/protected-media/"
+# Время кеширования файлов, чьи имена не заданы содержимым, секунды.
+MEDIA_CACHE_MAX_AGE = 60 * 60
+
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 
 EMAIL_FILE_PATH = BASE_DIR / "sent_emails"
@@ -0,0 +1,44 @@
+"""Настройки для боевого окружения.
+
+Запуск: DJANGO_SETTINGS_MODULE=blogicum.settings_production.
+"""
+import copy
+
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, MIDDLEWARE, TEMPLATES
+
+DEBUG = False
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app != "debug_toolbar"]
+
+MIDDLEWARE = [
+    middleware for middleware in MIDDLEWARE
+    if not middleware.startswith("debug_toolbar.")
+]
+
+# Разобранные шаблоны хранятся в памяти процесса; при старте воркера
+# они разбираются все сразу (см. wsgi.py, asgi.py).
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]["APP_DIRS"] = False
+TEMPLATES[0]["OPTIONS"]["loaders"] = [
+    (
+        "django.template.loaders.cached.Loader",
+        [
+            "django.template.loaders.filesystem.Loader",
+            "django.template.loaders.app_directories.Loader",
+        ],
+    ),
+]
+
+TEMPLATE_PRECOMPILE = True
+
+# Кеш общий для воркеров одного сервера. Если воркеры работают на
+# нескольких серверах, нужен сетевой кеш (memcached, Redis) с тем же
+# назначением.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": "/var/tmp/blogicum-cache",
+        "OPTIONS": {"MAX_ENTRIES": 100_000},
+    }
+}
@@ -1,3 +1,4 @@
+from core.views import export_view, media_view, query_stats_view
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
@@ -12,6 +13,8 @@ urlpatterns = [
     path("", include("blog.urls", namespace="blog")),
     path("pages/", include("pages.urls", namespace="pages")),
     path("admin/", admin.site.urls),
+    path("stats/queries/", query_stats_view, name="query_stats"),
+    path("export/", export_view, name="export"),
     path("auth/", include("django.contrib.auth.urls")),
     path(
         "auth/registration/",
@@ -29,4 +32,15 @@ if settings.DEBUG:
 
     urlpatterns += (path("__debug__/", include(debug_toolbar.urls)),)
 
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+if getattr(settings, "MEDIA_SERVE_MODE", None):
+    urlpatterns += (
+        path(
+            f"{settings.MEDIA_URL.lstrip('/')}<path:path>",
+            media_view,
+            name="media",
+        ),
+    )
+else:
+    urlpatterns += static(
+        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT
+    )
@@ -1,7 +1,12 @@
 import os
 
+from core.template_cache import precompile_templates
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
 
 application = get_wsgi_application()
+
+if settings.TEMPLATE_PRECOMPILE:
+    precompile_templates()
@@ -0,0 +1,65 @@
+import time
+import tracemalloc
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+# Кеш замеров: в памяти процесса, а не общий кеш сайта (CACHES), который
+# замеры очищали бы вместе с кешем работающих воркеров.
+BENCHMARK_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "benchmark",
+    }
+}
+
+
+def benchmark_settings(**overrides):
+    """Вернуть настройки замеров: DEBUG=False и собственный кеш."""
+    return override_settings(
+        DEBUG=False, CACHES=BENCHMARK_CACHES, **overrides
+    )
+
+
+def percentile(values, percent):
+    """Вернуть перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    index = max(round(len(ordered) * percent / 100) - 1, 0)
+    return ordered[index]
+
+
+def measure(func, repeat=20, warmup=2, setup=None):
+    """Измерить функцию и вернуть сводку.
+
+    Время считается в миллисекундах без трассировки памяти; пик памяти
+    (килобайты) снимается отдельным прогоном под tracemalloc, чтобы
+    трассировка не искажала время. setup вызывается перед каждым вызовом
+    func и в замер не входит.
+    """
+    setup = setup or (lambda: None)
+    for _ in range(warmup):
+        setup()
+        func()
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        setup()
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        queries = len(context.captured_queries)
+    setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "queries": queries,
+        "peak_kb": round(peak / 1024, 1),
+    }
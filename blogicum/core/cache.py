@@ -0,0 +1,75 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Область страниц главной ленты.
+INDEX_SCOPE = "index"
+
+
+def category_scope(slug):
+    """Вернуть область страниц ленты категории."""
+    return f"category:{slug}"
+
+
+def author_scope(username):
+    """Вернуть область страницы пользователя."""
+    return f"author:{username}"
+
+
+def _version_key(scope):
+    return f"version:{scope}"
+
+
+def get_versions(*scopes):
+    """Вернуть текущие поколения кеша для областей.
+
+    Ключи закешированных данных содержат поколение своей области, поэтому
+    сброс области — это увеличение её поколения: старые записи перестают
+    читаться и вытесняются по таймауту.
+
+    Новое поколение начинается с текущего времени в миллисекундах, а не с
+    единицы: если ключ поколения вытеснят из кеша, оно не повторит
+    прежние значения и не оживит устаревшие записи и ETag.
+    """
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    initial = time.time_ns() // 10 ** 6
+    missing = {key: initial for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def invalidate(*scopes):
+    """Сбросить закешированные данные областей."""
+    for scope in set(scopes):
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            get_versions(scope)
+        else:
+            # Бэкенды без собственного incr (файловый кеш) записывают
+            # значение заново со сроком по умолчанию: поколение должно
+            # жить бессрочно, иначе ETag и страницы области устареют сами.
+            cache.touch(key, None)
+
+
+def invalidate_on_commit(*scopes):
+    """Сбросить области после фиксации текущей транзакции.
+
+    Сброс до фиксации позволяет параллельному запросу прочитать новое
+    поколение вместе с прежними данными и закешировать их под новым
+    ключом. Вне транзакции сброс выполняется сразу.
+    """
+    transaction.on_commit(lambda: invalidate(*scopes))
+
+
+def get_page_cache_key(scopes, path):
+    """Вернуть ключ кеша страницы по её адресу и областям."""
+    versions = ".".join(map(str, get_versions(*scopes)))
+    digest = hashlib.md5(path.encode()).hexdigest()
+    return f"page:{':'.join(scopes)}:{versions}:{digest}"
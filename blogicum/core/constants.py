@@ -1 +1,14 @@
 POST_ON_MAIN = 10
+PAGE_WINDOW = 2
+# Время жизни закешированного количества постов ленты, секунды.
+POST_COUNT_CACHE_TIMEOUT = 60
+# Выше этого числа количество постов на главной считается приблизительно.
+POST_COUNT_APPROXIMATE_ABOVE = 1000 * POST_ON_MAIN
+# Количество слов в отрывке текста на карточке поста.
+EXCERPT_WORDS = 10
+# Время жизни закешированной страницы ленты для анонимов, секунды.
+PAGE_CACHE_TIMEOUT = 5 * 60
+# Количество комментариев на странице встроенной формы поста в админке.
+ADMIN_COMMENTS_PER_PAGE = 50
+# Ширины уменьшенных копий изображений постов, пиксели.
+IMAGE_VARIANT_WIDTHS = (320, 640, 1280)
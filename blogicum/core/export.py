@@ -0,0 +1,125 @@
+import json
+from datetime import datetime, time
+
+from blog.models import Category, Comment, Location, Post, User
+from django.core import serializers
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+# Форматы выгрузки: JSON Lines или фикстура loaddata (как db.json).
+EXPORT_FORMATS = ("jsonl", "json")
+
+# Количество объектов, выбираемых из базы за один запрос.
+EXPORT_CHUNK_SIZE = 1000
+
+# Поля пользователей в выгрузке: без хеша пароля, групп и прав.
+USER_EXPORT_FIELDS = (
+    "username",
+    "first_name",
+    "last_name",
+    "email",
+    "is_active",
+    "last_login",
+    "date_joined",
+)
+
+# Поля моделей в выгрузке; модели без записи выгружаются целиком.
+EXPORT_FIELDS = {User: USER_EXPORT_FIELDS}
+
+
+def parse_bound(value):
+    """Вернуть границу диапазона дат из строки ISO 8601 или None."""
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Неверная дата: {value}")
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def get_export_querysets(since=None, until=None, category=None):
+    """Вернуть выборки для выгрузки в порядке зависимостей моделей.
+
+    Фильтры по дате публикации и slug категории ограничивают посты;
+    комментарии, авторы, категории и местоположения выгружаются только
+    те, на которые ссылаются выгруженные посты, — так выгрузка остаётся
+    загружаемой фикстурой.
+    """
+    posts = Post.objects.all()
+    if since:
+        posts = posts.filter(pub_date__gte=since)
+    if until:
+        posts = posts.filter(pub_date__lt=until)
+    if category:
+        posts = posts.filter(category__slug=category)
+    comments = Comment.objects.all()
+    users = User.objects.all()
+    categories = Category.objects.all()
+    locations = Location.objects.all()
+    if since or until or category:
+        post_ids = posts.values("pk")
+        comments = comments.filter(post__in=post_ids)
+        users = users.filter(
+            pk__in=posts.values("author")
+        ) | users.filter(pk__in=comments.values("author"))
+        categories = categories.filter(pk__in=posts.values("category"))
+        locations = locations.filter(pk__in=posts.values("location"))
+    return (
+        users,
+        categories,
+        locations,
+        posts,
+        comments,
+    )
+
+
+def iter_chunks(query_set, chunk_size=EXPORT_CHUNK_SIZE):
+    """Выдавать объекты выборки пачками по ключу (pk > последнего).
+
+    В отличие от iterator() пачки можно дополнить prefetch_related, а в
+    отличие от OFFSET каждая пачка выбирается по индексу.
+    """
+    query_set = query_set.order_by("pk")
+    last_pk = None
+    while True:
+        chunk_query = query_set
+        if last_pk is not None:
+            chunk_query = chunk_query.filter(pk__gt=last_pk)
+        chunk = list(chunk_query[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def iter_export(export_format="jsonl", chunk_size=EXPORT_CHUNK_SIZE,
+                **filters):
+    """Выдавать выгрузку блога по частям, по строке на пачку объектов."""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат: {export_format}")
+    is_fixture = export_format == "json"
+    separator = ",\n" if is_fixture else "\n"
+    first = True
+    if is_fixture:
+        yield "[\n"
+    for query_set in get_export_querysets(**filters):
+        fields = EXPORT_FIELDS.get(query_set.model)
+        for chunk in iter_chunks(query_set, chunk_size):
+            text = separator.join(
+                json.dumps(item, cls=DjangoJSONEncoder, ensure_ascii=False)
+                for item in serializers.serialize(
+                    "python", chunk, fields=fields
+                )
+            )
+            yield text if first else separator + text
+            first = False
+    if is_fixture:
+        yield "\n]\n"
+    elif not first:
+        yield "\n"
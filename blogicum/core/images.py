@@ -0,0 +1,85 @@
+import math
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from core.constants import IMAGE_VARIANT_WIDTHS
+
+# Качество JPEG уменьшенных копий.
+JPEG_QUALITY = 85
+# Тег EXIF Orientation и его значения с поворотом на 90°.
+EXIF_ORIENTATION = 0x0112
+ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def _has_alpha(image):
+    return image.mode in ("RGBA", "LA", "PA") or (
+        image.mode == "P" and "transparency" in image.info
+    )
+
+
+def make_image_variants(name, widths=IMAGE_VARIANT_WIDTHS,
+                        storage=default_storage):
+    """Сохранить уменьшенные копии изображения и вернуть их описание.
+
+    Копии шириной меньше оригинала пишутся рядом с ним в variants/:
+    JPEG, а при прозрачности PNG. Возвращается словарь с размерами
+    оригинала и списком копий {"name", "width", "height"} по
+    возрастанию ширины. У анимированных изображений копий нет: копия
+    сохранила бы только первый кадр.
+    """
+    widths = sorted(widths, reverse=True)
+    with storage.open(name) as source, Image.open(source) as image:
+        width, height = image.size
+        if image.getexif().get(EXIF_ORIENTATION) in ROTATED_ORIENTATIONS:
+            width, height = height, width
+        if getattr(image, "is_animated", False):
+            return {"width": width, "height": height, "variants": []}
+        if widths and widths[0] < width:
+            # JPEG декодируется сразу уменьшенным в 2^n раз, но не меньше
+            # самой большой копии.
+            scale = widths[0] / width
+            image.draft("RGB", (
+                math.ceil(image.width * scale),
+                math.ceil(image.height * scale),
+            ))
+        image = ImageOps.exif_transpose(image)
+        alpha = _has_alpha(image)
+        image = image.convert("RGBA" if alpha else "RGB")
+        fmt, extension = ("PNG", "png") if alpha else ("JPEG", "jpg")
+        directory, filename = os.path.split(name)
+        stem = os.path.splitext(filename)[0]
+        variants = []
+        for variant_width in widths:
+            if variant_width >= width:
+                continue
+            # Каждая копия уменьшается из предыдущей, большей, а не из
+            # оригинала: пикселей обрабатывается меньше.
+            image = image.resize(
+                (variant_width, max(round(height * variant_width / width), 1)),
+                Image.Resampling.LANCZOS,
+            )
+            buffer = BytesIO()
+            image.save(buffer, fmt, quality=JPEG_QUALITY, optimize=True)
+            variant_name = storage.save(
+                os.path.join(
+                    directory, "variants",
+                    f"{stem}-{variant_width}w.{extension}",
+                ),
+                ContentFile(buffer.getvalue()),
+            )
+            variants.append({
+                "name": variant_name,
+                "width": image.width,
+                "height": image.height,
+            })
+    return {"width": width, "height": height, "variants": variants[::-1]}
+
+
+def delete_image_variants(data, storage=default_storage):
+    """Удалить файлы копий, описанных make_image_variants."""
+    for variant in (data or {}).get("variants", ()):
+        storage.delete(variant["name"])
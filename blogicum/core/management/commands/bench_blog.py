@@ -0,0 +1,219 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Category, Comment, Post, User
+from core.benchmark import benchmark_settings, measure
+
+# Сохранённый результат для сравнения: python manage.py bench_blog
+# --sizes 20 1000 10000 100000 --output benchmarks/bench_blog.json.
+BASELINE = settings.BASE_DIR / "benchmarks" / "bench_blog.json"
+
+
+class Command(BaseCommand):
+    help = (
+        "Замерить страницы и формы blog.urls на сгенерированных данных "
+        "разного объёма и сравнить результат с сохранённым. Данные "
+        "создаются во временной тестовой базе (см. generate_data)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000],
+            help="Количество постов в наборах данных.",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20,
+            help="Количество замеров на маршрут.",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Зерно generate_data.",
+        )
+        parser.add_argument(
+            "--output", type=Path, help="Сохранить результат в JSON-файл.",
+        )
+        parser.add_argument(
+            "--baseline", type=Path, nargs="?", const=BASELINE,
+            help=(
+                "JSON-файл прошлого запуска для сравнения; без значения — "
+                "сохранённый в репозитории."
+            ),
+        )
+        parser.add_argument(
+            "--threshold", type=float, default=0.2,
+            help="Допустимый рост p50 относительно базового, доля.",
+        )
+
+    def generate(self, size, seed):
+        call_command(
+            "generate_data",
+            posts=size,
+            comments=size * 3,
+            users=max(size // 20, 10),
+            seed=seed,
+            stdout=self.stderr,
+        )
+
+    def get_author(self):
+        """Вернуть самого активного автора видимых постов."""
+        return (
+            User.objects.filter(authors__is_visible=True)
+            .annotate(posts=Count("authors"))
+            .order_by("-posts")
+            .first()
+        )
+
+    def check_status(self, response, status):
+        if response.status_code != status:
+            raise CommandError(
+                f"{response.request['PATH_INFO']}: ответ "
+                f"{response.status_code}, ожидался {status}."
+            )
+
+    def get_routes(self, client, author, repeat):
+        """Вернуть замеряемые маршруты: имя -> функция запроса."""
+        post = Post.objects.filter(author=author, is_visible=True).first()
+        category = Category.objects.filter(
+            posts__is_visible=True
+        ).first()
+        comment = Comment.objects.create(
+            post=post, author=author, text="Комментарий для замеров"
+        )
+        form = {
+            "title": "Пост для замеров",
+            "text": "Текст поста для замеров",
+            "pub_date": timezone.localtime().strftime("%Y-%m-%d %H:%M"),
+            "category": category.pk,
+            "is_published": "on",
+        }
+        detail_url = reverse("blog:post_detail", args=[post.pk])
+        comment_kwargs = {"pk": post.pk, "comment_pk": comment.pk}
+
+        def get(url):
+            def request():
+                self.check_status(client.get(url), 200)
+            return request
+
+        def post_form(url, data):
+            def request():
+                self.check_status(client.post(url, data), 302)
+            return request
+
+        # Каждый вызов удаляет свой комментарий: они создаются заранее,
+        # чтобы создание не попадало в замер (прогрев, замеры и прогон
+        # под tracemalloc — см. core.benchmark.measure).
+        victims = [
+            Comment.objects.create(
+                post=post, author=author, text="Удаляемый комментарий"
+            ).pk
+            for _ in range(repeat + 3)
+        ]
+
+        def delete_comment():
+            url = reverse(
+                "blog:delete_comment",
+                kwargs={"pk": post.pk, "comment_pk": victims.pop()},
+            )
+            self.check_status(client.post(url), 302)
+
+        return {
+            "index": get(reverse("blog:index")),
+            "category": get(
+                reverse("blog:category_posts", args=[category.slug])
+            ),
+            "profile": get(reverse("blog:profile", args=[author.username])),
+            "post_detail": get(detail_url),
+            "create_post": post_form(reverse("blog:create_post"), form),
+            "edit_post": post_form(
+                reverse("blog:edit_post", args=[post.pk]),
+                {**form, "title": post.title, "text": post.text},
+            ),
+            "add_comment": post_form(
+                reverse("blog:add_comment", args=[post.pk]),
+                {"text": "Новый комментарий"},
+            ),
+            "edit_comment": post_form(
+                reverse("blog:edit_comment", kwargs=comment_kwargs),
+                {"text": "Исправленный комментарий"},
+            ),
+            "delete_comment": delete_comment,
+        }
+
+    def measure_size(self, size, options):
+        self.generate(size, options["seed"])
+        author = self.get_author()
+        client = Client()
+        client.force_login(author)
+        results = {}
+        for name, func in self.get_routes(
+            client, author, options["repeat"]
+        ).items():
+            # Кеши страниц и количеств сбрасываются перед каждым вызовом,
+            # чтобы каждый замер выполнял запросы к базе.
+            results[name] = measure(
+                func, repeat=options["repeat"], setup=cache.clear
+            )
+        return results
+
+    def compare(self, results, baseline, threshold):
+        """Вернуть список регрессий относительно базового запуска."""
+        regressions = []
+        for size, routes in results.items():
+            for name, result in routes.items():
+                before = baseline.get(size, {}).get(name)
+                if before is None:
+                    continue
+                if result["queries"] > before["queries"]:
+                    regressions.append(
+                        f"{size} {name}: запросов {before['queries']} -> "
+                        f"{result['queries']}"
+                    )
+                if result["p50_ms"] > before["p50_ms"] * (1 + threshold):
+                    regressions.append(
+                        f"{size} {name}: p50 {before['p50_ms']:.2f} -> "
+                        f"{result['p50_ms']:.2f} мс"
+                    )
+        return regressions
+
+    def handle(self, *args, **options):
+        results = {}
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            with benchmark_settings():
+                for size in options["sizes"]:
+                    call_command("flush", interactive=False, verbosity=0)
+                    results[str(size)] = self.measure_size(size, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = json.dumps(results, indent=2)
+        if options["output"]:
+            options["output"].write_text(report, encoding="utf-8")
+        self.stdout.write(report)
+
+        if options["baseline"]:
+            baseline = json.loads(
+                options["baseline"].read_text(encoding="utf-8")
+            )
+            regressions = self.compare(
+                results, baseline, options["threshold"]
+            )
+            if regressions:
+                raise CommandError(
+                    "Регрессии относительно базового запуска:\n"
+                    + "\n".join(regressions)
+                )
+            self.stderr.write(
+                self.style.SUCCESS("Регрессий относительно базового нет.")
+            )
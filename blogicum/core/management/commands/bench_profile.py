@@ -0,0 +1,108 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Category, Post
+from core.benchmark import benchmark_settings, measure
+from core.paginator import encode_cursor
+
+# Размер пачки INSERT при создании постов.
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Измерить время ответа и пик памяти страницы автора в зависимости "
+        "от числа его постов. Данные создаются во временной тестовой базе."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[10, 10_000, 100_000],
+            help="Количество постов у авторов.",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20,
+            help="Количество замеров на страницу.",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Вывести результат в JSON.",
+        )
+
+    def create_author(self, size, category):
+        """Создать автора с size видимыми постами."""
+        author = get_user_model().objects.create(username=f"author-{size}")
+        now = timezone.now()
+        for start in range(0, size, BATCH_SIZE):
+            Post.objects.bulk_create(
+                Post(
+                    title=f"Пост {number}",
+                    text=f"Текст поста {number}",
+                    excerpt=f"Текст поста {number}",
+                    pub_date=now - timedelta(minutes=number),
+                    author=author,
+                    category=category,
+                    is_visible=True,
+                )
+                for number in range(start, min(start + BATCH_SIZE, size))
+            )
+        return author
+
+    def measure_author(self, author, repeat):
+        client = Client()
+        url = reverse("blog:profile", args=[author.username])
+        posts = Post.objects.filter(author=author).order_by("-pub_date", "-id")
+        middle = posts[posts.count() // 2]
+        urls = {
+            "first": url,
+            "middle": f"{url}?after={encode_cursor(middle)}",
+        }
+
+        # Кеш страниц и количества постов сбрасывается перед каждым
+        # вызовом, чтобы каждый замер выполнял запросы к базе.
+        return {
+            name: measure(
+                lambda: client.get(url), repeat=repeat, setup=cache.clear
+            )
+            for name, url in urls.items()
+        }
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            category = Category.objects.create(
+                title="Категория", slug="bench", is_published=True
+            )
+            results = {}
+            with benchmark_settings():
+                for size in options["sizes"]:
+                    author = self.create_author(size, category)
+                    results[size] = self.measure_author(
+                        author, options["repeat"]
+                    )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{'Постов':>8}{'Страница':>10}{'p50, мс':>10}{'p95, мс':>10}"
+            f"{'запросов':>10}{'память, КБ':>12}"
+        )
+        for size, pages in results.items():
+            for name, result in pages.items():
+                self.stdout.write(
+                    f"{size:>8}{name:>10}{result['p50_ms']:>10.2f}"
+                    f"{result['p95_ms']:>10.2f}{result['queries']:>10}"
+                    f"{result['peak_kb']:>12.1f}"
+                )
@@ -0,0 +1,106 @@
+import copy
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from blog.models import Post
+from core.benchmark import benchmark_settings, measure
+from core.template_cache import precompile_templates
+
+BASE_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+
+
+def templates_setting(cached):
+    """Вернуть TEMPLATES с кеширующим загрузчиком или без него."""
+    templates = copy.deepcopy(settings.TEMPLATES)
+    templates[0]["APP_DIRS"] = False
+    templates[0]["OPTIONS"]["debug"] = False
+    templates[0]["OPTIONS"]["loaders"] = (
+        [("django.template.loaders.cached.Loader", BASE_LOADERS)]
+        if cached else BASE_LOADERS
+    )
+    return templates
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнить время ответа страниц с кеширующим загрузчиком шаблонов "
+        "и предварительным разбором и без них. Нужны данные в базе."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat", type=int, default=50,
+            help="Количество замеров на страницу.",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Вывести результат в JSON.",
+        )
+
+    def get_urls(self):
+        post = (
+            Post.objects.visible().select_related("author", "category")
+            .first()
+        )
+        if post is None:
+            raise CommandError(
+                "Нет видимых постов: загрузите фикстуру командой loaddata."
+            )
+        return {
+            "blog:index": reverse("blog:index"),
+            "blog:category_posts": reverse(
+                "blog:category_posts", args=[post.category.slug]
+            ),
+            "blog:profile": reverse("blog:profile", args=[post.author]),
+            "blog:post_detail": reverse("blog:post_detail", args=[post.pk]),
+            "pages:about": reverse("pages:about"),
+        }
+
+    def measure_urls(self, urls, repeat):
+        client = Client()
+        # Под авторизованным пользователем страницы не берутся из кеша.
+        client.force_login(get_user_model().objects.first())
+
+        # Кеш фрагментов и страниц сбрасывается перед каждым вызовом,
+        # чтобы каждый замер рендерил шаблоны полностью.
+        return {
+            name: measure(
+                lambda: client.get(url), repeat=repeat, setup=cache.clear
+            )
+            for name, url in urls.items()
+        }
+
+    def handle(self, *args, **options):
+        urls = self.get_urls()
+        repeat = options["repeat"]
+        results = {}
+        uncached = templates_setting(cached=False)
+        cached = templates_setting(cached=True)
+        with benchmark_settings(TEMPLATES=uncached):
+            results["uncached"] = self.measure_urls(urls, repeat)
+        with benchmark_settings(TEMPLATES=cached):
+            precompile_templates()
+            results["cached"] = self.measure_urls(urls, repeat)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{'Страница':<22}{'без кеша, мс':>14}{'с кешем, мс':>14}"
+            f"{'выигрыш':>10}"
+        )
+        for name in urls:
+            before = results["uncached"][name]["p50_ms"]
+            after = results["cached"][name]["p50_ms"]
+            gain = (before - after) / before * 100 if before else 0
+            self.stdout.write(
+                f"{name:<22}{before:>14.2f}{after:>14.2f}{gain:>9.0f}%"
+            )
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.export import (EXPORT_CHUNK_SIZE, EXPORT_FORMATS, iter_export,
+                         parse_bound)
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгрузить пользователей, категории, местоположения, посты и "
+        "комментарии потоком, не собирая выгрузку в памяти."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format", choices=EXPORT_FORMATS, default="jsonl",
+            help="jsonl — объект на строку; json — фикстура для loaddata.",
+        )
+        parser.add_argument(
+            "--since", help="Посты с датой публикации не раньше (ISO 8601).",
+        )
+        parser.add_argument(
+            "--until", help="Посты с датой публикации раньше (ISO 8601).",
+        )
+        parser.add_argument("--category", help="Slug категории постов.")
+        parser.add_argument(
+            "--chunk-size", type=int, default=EXPORT_CHUNK_SIZE,
+            help="Количество объектов в одном запросе к базе.",
+        )
+        parser.add_argument(
+            "--output", "-o", help="Файл выгрузки; по умолчанию stdout.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            since = parse_bound(options["since"])
+            until = parse_bound(options["until"])
+        except ValueError as error:
+            raise CommandError(error)
+        parts = iter_export(
+            options["format"],
+            chunk_size=options["chunk_size"],
+            since=since,
+            until=until,
+            category=options["category"],
+        )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as output:
+                output.writelines(parts)
+        else:
+            for part in parts:
+                self.stdout.write(part, ending="")
@@ -0,0 +1,153 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Func, OuterRef, Subquery
+from django.utils import timezone
+
+from blog.models import Post
+from core.cache import INDEX_SCOPE, author_scope, category_scope, invalidate
+from core.models import MediaBlob
+from core.storage import hashed_storage, is_hashed_name, take_upload
+
+# Количество имён файлов в одном запросе проверки ссылок.
+DELETE_BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        "Перенести изображения постов в хранилище с именами по "
+        "содержимому и пересчитать ссылки на файлы. Посты обновляются "
+        "по одному, прежние файлы остаются до --delete-old, поэтому "
+        "сайт работает во время переноса."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--delete-old",
+            action="store_true",
+            help=(
+                "Удалить файлы прежнего каталога и файлы хранилища, на "
+                "которые нет ссылок; можно запускать отдельно, после "
+                "истечения кеша страниц."
+            ),
+        )
+
+    def move(self, post):
+        """Перенести изображение поста и вернуть прежнее имя или None."""
+        old_name = post.image.name
+        try:
+            with hashed_storage.open(old_name) as source:
+                new_name = hashed_storage.save(old_name, source)
+        except OSError as error:
+            self.stderr.write(f"Пост {post.pk}: {error}")
+            return None
+        # Ссылку, учтённую при сохранении, получает этот пост.
+        take_upload(new_name)
+        image_variants = post.image_variants
+        if image_variants.get("source") == old_name:
+            # Копии сделаны из того же содержимого и остаются верными.
+            image_variants = {**image_variants, "source": new_name}
+        # Условие на прежнее имя: если изображение успели заменить, новое
+        # не перезаписывается.
+        moved = Post.objects.filter(pk=post.pk, image=old_name).update(
+            image=new_name,
+            image_variants=image_variants,
+            updated_at=timezone.now(),
+        )
+        if not moved:
+            MediaBlob.objects.release(new_name, hashed_storage)
+            return None
+        return old_name
+
+    def recount(self):
+        """Пересчитать ссылки на файлы по изображениям постов.
+
+        Ссылки из постов, созданных в обход save() (bulk_create,
+        stream_loaddata), учитываются только здесь. Пересчёт — один
+        UPDATE с подзапросом и только для файлов, записанных до его
+        начала: файл, загруженный во время пересчёта, ещё не попал в пост
+        и не должен остаться без ссылок.
+        """
+        missing = [
+            name for name in (
+                Post.objects.exclude(image="")
+                .exclude(image__in=MediaBlob.objects.values("name"))
+                .order_by()
+                .values_list("image", flat=True)
+                .distinct()
+            )
+            if is_hashed_name(name) and hashed_storage.exists(name)
+        ]
+        MediaBlob.objects.bulk_create([
+            MediaBlob(name=name, size=hashed_storage.size(name))
+            for name in missing
+        ], ignore_conflicts=True)
+        blobs = MediaBlob.objects.filter(created_at__lte=timezone.now())
+        references = (
+            Post.objects.filter(image=OuterRef("name"))
+            .order_by()
+            .annotate(count=Func(F("pk"), function="COUNT"))
+            .values("count")
+        )
+        blobs.update(refcount=Subquery(references))
+        return list(blobs.filter(refcount=0).values_list("name", flat=True))
+
+    def delete_old(self):
+        """Удалить файлы прежнего плоского каталога без ссылок из постов.
+
+        Копии изображений лежат во вложенном каталоге variants и
+        остаются: на них ссылаются посты.
+        """
+        directory = Post._meta.get_field("image").upload_to
+        _, files = hashed_storage.listdir(directory)
+        names = [
+            f"{directory}/{filename}" for filename in files
+            if not filename.startswith(".")
+        ]
+        deleted = 0
+        for start in range(0, len(names), DELETE_BATCH_SIZE):
+            batch = names[start:start + DELETE_BATCH_SIZE]
+            referenced = set(
+                Post.objects.filter(image__in=batch)
+                .values_list("image", flat=True)
+            )
+            for name in batch:
+                if name not in referenced:
+                    hashed_storage.delete(name)
+                    deleted += 1
+        return deleted
+
+    def handle(self, *args, **options):
+        query_set = (
+            Post.objects.exclude(image="")
+            .select_related("category", "author")
+            .only(
+                "pk", "image", "image_variants",
+                "category__slug", "author__username",
+            )
+        )
+        moved = failed = 0
+        scopes = {INDEX_SCOPE}
+        for post in query_set.iterator():
+            if is_hashed_name(post.image.name):
+                continue
+            if self.move(post) is None:
+                failed += 1
+                continue
+            moved += 1
+            if post.category is not None:
+                scopes.add(category_scope(post.category.slug))
+            scopes.add(author_scope(post.author.username))
+        unused = self.recount()
+        if moved:
+            # Закешированные ленты ссылаются на прежние имена файлов.
+            invalidate(*scopes)
+
+        deleted = 0
+        if options["delete_old"]:
+            deleted = self.delete_old()
+            for name in unused:
+                MediaBlob.objects.purge_unused(name, hashed_storage)
+        self.stdout.write(self.style.SUCCESS(
+            f"Перенесено изображений: {moved}, с ошибками: {failed}, "
+            f"удалено прежних файлов: {deleted}, файлов без ссылок: "
+            f"{len(unused)}."
+        ))
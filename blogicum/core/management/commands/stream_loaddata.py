@@ -0,0 +1,219 @@
+import gzip
+import json
+import re
+import time
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.core.serializers.base import DeserializationError
+from django.core.serializers.python import Deserializer
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from blog.models import Comment, Post
+
+# Разделители между элементами массива фикстуры.
+SEPARATORS = re.compile(r"[\s,]*")
+
+
+def iter_json_array(stream, chunk_size=1 << 20):
+    """Выдавать элементы JSON-массива из потока по одному.
+
+    В памяти держится только непрочитанный хвост буфера, а не весь
+    документ: каждый элемент разбирается JSONDecoder.raw_decode, и если
+    он обрезан концом буфера, дочитывается следующий кусок.
+    """
+    decoder = json.JSONDecoder()
+    buffer = stream.read(chunk_size)
+    position = SEPARATORS.match(buffer).end()
+    if buffer[position:position + 1] != "[":
+        raise DeserializationError("Фикстура должна быть JSON-массивом.")
+    position += 1
+    eof = False
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if position < len(buffer) and buffer[position] == "]":
+            return
+        try:
+            if position == len(buffer):
+                raise json.JSONDecodeError("Нужны данные", buffer, position)
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as error:
+            if eof:
+                raise DeserializationError(
+                    f"Фикстура оборвана или повреждена: {error}"
+                )
+            chunk = stream.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield item
+        if position >= chunk_size:
+            buffer = buffer[position:]
+            position = 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Загрузить большую фикстуру в формате JSON (как loaddata), читая "
+        "её потоком и вставляя объекты пачками bulk_create. После загрузки "
+        "пересчитываются производные поля постов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "fixture", help="Путь к JSON-фикстуре, можно сжатой gzip.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Количество объектов модели в одном запросе INSERT.",
+        )
+        parser.add_argument(
+            "--transaction-size", type=int, default=5000,
+            help="Количество объектов в одной транзакции.",
+        )
+        parser.add_argument(
+            "--database", default=DEFAULT_DB_ALIAS,
+            help="База данных для загрузки.",
+        )
+        parser.add_argument(
+            "--ignorenonexistent", "-i", action="store_true",
+            help="Пропускать поля, которых нет в моделях.",
+        )
+
+    def open(self, path):
+        if path.endswith(".gz"):
+            return gzip.open(path, "rt", encoding="utf-8")
+        return open(path, encoding="utf-8")
+
+    def write_batch(self, model, objs):
+        """Вставить новые объекты и обновить существующие.
+
+        Как и loaddata, фикстура перезаписывает строки с теми же ключами;
+        модели сохраняются в обход save() и сигналов.
+        """
+        manager = model._base_manager.using(self.using)
+        existing = set(
+            manager.filter(pk__in=[obj.pk for obj in objs])
+            .values_list("pk", flat=True)
+        )
+        created = [obj for obj in objs if obj.pk not in existing]
+        updated = [obj for obj in objs if obj.pk in existing]
+        manager.bulk_create(created)
+        if updated:
+            manager.bulk_update(updated, [
+                field.name for field in model._meta.concrete_fields
+                if not field.primary_key
+            ])
+
+    def write_m2m(self, field, rows):
+        through = field.remote_field.through
+        source = f"{field.m2m_field_name()}_id"
+        target = f"{field.m2m_reverse_field_name()}_id"
+        through._base_manager.using(self.using).bulk_create(
+            [through(**{source: pk, target: value}) for pk, value in rows],
+            ignore_conflicts=True,
+        )
+
+    def load_chunk(self, chunk):
+        """Загрузить объекты одной транзакции, сгруппировав по моделям."""
+        pending = defaultdict(list)
+        m2m = defaultdict(list)
+        for deserialized in chunk:
+            obj = deserialized.object
+            model = type(obj)
+            self.counts[model._meta.label] += 1
+            self.models.add(model)
+            if deserialized.deferred_fields:
+                self.deferred.append(deserialized)
+            if obj.pk is None:
+                # Без ключа объект нельзя сопоставить со строкой базы.
+                deserialized.save(using=self.using)
+                continue
+            pending[model].append(obj)
+            for name, values in (deserialized.m2m_data or {}).items():
+                field = model._meta.get_field(name)
+                m2m[field].extend((obj.pk, value) for value in values)
+            if len(pending[model]) >= self.batch_size:
+                self.write_batch(model, pending.pop(model))
+        for model, objs in pending.items():
+            self.write_batch(model, objs)
+        for field, rows in m2m.items():
+            self.write_m2m(field, rows)
+
+    def refresh_derived_fields(self):
+        """Пересчитать поля постов, которые bulk_create не заполняет."""
+        if not self.models & {Post, Comment}:
+            return
+        posts = Post.objects.using(self.using)
+        posts.update_comment_count()
+        posts.refresh_visibility()
+        call_command(
+            "backfill_excerpts", batch_size=self.batch_size,
+            database=self.using, stdout=self.stdout,
+        )
+
+    def handle(self, *args, **options):
+        self.using = options["database"]
+        self.batch_size = options["batch_size"]
+        transaction_size = options["transaction_size"]
+        self.counts = Counter()
+        self.models = set()
+        self.deferred = []
+        connection = connections[self.using]
+        start = time.perf_counter()
+
+        try:
+            with self.open(options["fixture"]) as stream:
+                objects = Deserializer(
+                    iter_json_array(stream),
+                    using=self.using,
+                    ignorenonexistent=options["ignorenonexistent"],
+                    handle_forward_references=True,
+                )
+                # Ссылки проверяются один раз в конце: в фикстуре объект
+                # может ссылаться на ещё не загруженные строки.
+                with connection.constraint_checks_disabled():
+                    while True:
+                        chunk = list(islice(objects, transaction_size))
+                        if not chunk:
+                            break
+                        with transaction.atomic(using=self.using):
+                            self.load_chunk(chunk)
+                        # При DEBUG журнал запросов хранит тексты INSERT
+                        # и рос бы вместе с фикстурой.
+                        connection.queries_log.clear()
+                    with transaction.atomic(using=self.using):
+                        for deserialized in self.deferred:
+                            deserialized.save_deferred_fields(
+                                using=self.using
+                            )
+        except (OSError, DeserializationError) as error:
+            raise CommandError(f"Не удалось загрузить фикстуру: {error}")
+        connection.check_constraints(
+            table_names=[model._meta.db_table for model in self.models]
+        )
+
+        sequence_sql = connection.ops.sequence_reset_sql(
+            no_style(), self.models
+        )
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+        self.refresh_derived_fields()
+        # Закешированные страницы и количества загрузка обходит.
+        cache.clear()
+
+        elapsed = time.perf_counter() - start
+        total = sum(self.counts.values())
+        for label, count in sorted(self.counts.items()):
+            self.stdout.write(f"{label}: {count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Загружено объектов: {total} за {elapsed:.1f} с "
+            f"({total / elapsed if elapsed else total:.0f} в секунду)."
+        ))
@@ -0,0 +1,198 @@
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import (ImproperlyConfigured,
+                                    SuspiciousFileOperation)
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                quote_etag)
+from django.utils.http import http_date, parse_http_date_safe
+
+from core.storage import HASHED_NAME
+
+# Способы отдачи файлов: ответ с файлом (WSGI-сервер передаёт его ядру
+# через sendfile) или заголовок для фронтового сервера.
+MEDIA_SERVE_MODES = ("file", "x-accel-redirect", "x-sendfile")
+
+# Размер блока, если сервер читает файл сам, без sendfile.
+MEDIA_BLOCK_SIZE = 256 * 1024
+
+# Время кеширования файлов с именами по содержимому: они не меняются.
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class FileRange:
+    """Часть открытого файла для FileResponse.
+
+    read() не выходит за конец диапазона, а fileno() и позиция файла
+    позволяют WSGI-серверу отправить ту же часть через sendfile: длину
+    он берёт из Content-Length.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """Вернуть (начало, длина) диапазона из заголовка Range.
+
+    None — заголовка нет или он не поддерживается (несколько
+    диапазонов), тогда отдаётся весь файл; ValueError — диапазон за
+    пределами файла.
+    """
+    match = BYTE_RANGE.match(header or "")
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # bytes=-N: последние N байт.
+        length = min(int(last), size)
+        if not length:
+            raise ValueError(header)
+        return size - length, length
+    start = int(first)
+    if start >= size:
+        raise ValueError(header)
+    end = min(int(last), size - 1) if last else size - 1
+    if end < start:
+        return None
+    return start, end - start + 1
+
+
+def if_range_matches(request, etag, last_modified):
+    """Проверить If-Range: диапазон отдаётся, только если файл тот же."""
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if if_range is None:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def get_media_path(path):
+    """Вернуть абсолютный путь файла в MEDIA_ROOT или вызвать Http404."""
+    path = posixpath.normpath(path).lstrip("/")
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Файл не найден.")
+    if not os.path.isfile(full_path):
+        raise Http404("Файл не найден.")
+    return path, full_path
+
+
+def serve_media(request, path, mode="file"):
+    """Отдать файл из MEDIA_ROOT с учётом Range и условных заголовков."""
+    if mode not in MEDIA_SERVE_MODES:
+        raise ImproperlyConfigured(f"Неизвестный MEDIA_SERVE_MODE: {mode}")
+    path, full_path = get_media_path(path)
+    stat = os.stat(full_path)
+    last_modified = int(stat.st_mtime)
+    hashed = HASHED_NAME.search(path)
+    # Для имён по содержимому версия — сам хеш, иначе время и размер.
+    etag = quote_etag(
+        os.path.splitext(os.path.basename(path))[0] if hashed
+        else f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+    )
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        return set_media_headers(response, hashed, etag, last_modified)
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or "application/octet-stream"
+    if mode == "x-accel-redirect":
+        # Диапазоны и отправку файла выполняет nginx во внутреннем
+        # location с этим префиксом.
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = quote(
+            getattr(
+                settings, "MEDIA_ACCEL_REDIRECT_PREFIX", "/protected-media/"
+            ) + path
+        )
+    elif mode == "x-sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = full_path
+    else:
+        response = file_response(
+            request, full_path, stat.st_size, content_type, etag,
+            last_modified,
+        )
+    if encoding:
+        response["Content-Encoding"] = encoding
+    return set_media_headers(response, hashed, etag, last_modified)
+
+
+def file_response(request, full_path, size, content_type, etag,
+                  last_modified):
+    """Вернуть ответ с файлом или его частью (206)."""
+    byte_range = None
+    if if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_range(request.META.get("HTTP_RANGE"), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+    file = open(full_path, "rb")
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, length = byte_range
+        response = FileResponse(
+            FileRange(file, start, length),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Length"] = length
+        response["Content-Range"] = (
+            f"bytes {start}-{start + length - 1}/{size}"
+        )
+    response.block_size = MEDIA_BLOCK_SIZE
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def set_media_headers(response, hashed, etag, last_modified):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    if hashed:
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=getattr(settings, "MEDIA_CACHE_MAX_AGE", 60 * 60),
+        )
+    return response
@@ -0,0 +1,191 @@
+import copy
+import logging
+import os
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# Длина SQL самого медленного запроса в сводке.
+SLOWEST_SQL_LENGTH = 500
+
+# Ключи общего кеша: список процессов и счётчики каждого процесса.
+STATS_WORKERS_KEY = "query-stats:workers"
+STATS_KEY = "query-stats:{worker}"
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше запросов, чем позволяет бюджет."""
+
+
+class QueryRecorder:
+    """Счётчик запросов одного HTTP-запроса для execute_wrapper."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_sql = ""
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.count += 1
+            self.total_ms += elapsed
+            if elapsed >= self.slowest_ms:
+                self.slowest_ms = elapsed
+                self.slowest_sql = sql
+
+
+def _new_stats():
+    return {
+        "requests": 0,
+        "queries": 0,
+        "max_queries": 0,
+        "sql_ms": 0.0,
+        "slowest_ms": 0.0,
+        "slowest_sql": "",
+        "over_budget": 0,
+    }
+
+
+def _merge_stats(total, stats):
+    """Добавить счётчики одного процесса к общим."""
+    for field in ("requests", "queries", "sql_ms", "over_budget"):
+        total[field] += stats[field]
+    total["max_queries"] = max(total["max_queries"], stats["max_queries"])
+    if stats["slowest_ms"] >= total["slowest_ms"]:
+        total["slowest_ms"] = stats["slowest_ms"]
+        total["slowest_sql"] = stats["slowest_sql"]
+
+
+class QueryStats:
+    """Сводка запросов к базе по именам представлений.
+
+    Каждый процесс копит счётчики у себя и не реже раза в
+    QUERY_STATS_FLUSH_SECONDS записывает их в общий кеш под своим
+    ключом; сводка складывает счётчики всех процессов.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+        self._flushed_at = None
+
+    @property
+    def worker(self):
+        """Вернуть имя процесса: после fork у воркера свой pid."""
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def add(self, view_name, recorder, over_budget):
+        with self._lock:
+            stats = self._views.setdefault(view_name, _new_stats())
+            stats["requests"] += 1
+            stats["queries"] += recorder.count
+            stats["max_queries"] = max(stats["max_queries"], recorder.count)
+            stats["sql_ms"] += recorder.total_ms
+            stats["over_budget"] += over_budget
+            if recorder.slowest_ms >= stats["slowest_ms"]:
+                stats["slowest_ms"] = recorder.slowest_ms
+                stats["slowest_sql"] = (
+                    recorder.slowest_sql[:SLOWEST_SQL_LENGTH]
+                )
+            interval = getattr(settings, "QUERY_STATS_FLUSH_SECONDS", 10)
+            due = (
+                self._flushed_at is None
+                or time.monotonic() - self._flushed_at >= interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Записать счётчики процесса в общий кеш."""
+        with self._lock:
+            views = copy.deepcopy(self._views)
+            self._flushed_at = time.monotonic()
+        worker = self.worker
+        cache.set(STATS_KEY.format(worker=worker), views, timeout=None)
+        workers = cache.get(STATS_WORKERS_KEY, [])
+        if worker not in workers:
+            cache.set(STATS_WORKERS_KEY, [*workers, worker], timeout=None)
+
+    def summary(self):
+        """Вернуть сводку всех процессов: средние и худшие значения."""
+        self.flush()
+        workers = cache.get(STATS_WORKERS_KEY, [])
+        views = {}
+        snapshots = cache.get_many(
+            [STATS_KEY.format(worker=worker) for worker in workers]
+        )
+        for snapshot in snapshots.values():
+            for view_name, stats in snapshot.items():
+                _merge_stats(views.setdefault(view_name, _new_stats()), stats)
+        budgets = getattr(settings, "QUERY_BUDGETS", {})
+        return {
+            view_name: {
+                "requests": stats["requests"],
+                "avg_queries": round(stats["queries"] / stats["requests"], 2),
+                "max_queries": stats["max_queries"],
+                "budget": budgets.get(view_name),
+                "over_budget": stats["over_budget"],
+                "avg_sql_ms": round(stats["sql_ms"] / stats["requests"], 3),
+                "slowest_ms": round(stats["slowest_ms"], 3),
+                "slowest_sql": stats["slowest_sql"],
+            }
+            for view_name, stats in sorted(views.items())
+        }
+
+    def reset(self):
+        """Обнулить счётчики всех процессов."""
+        with self._lock:
+            self._views.clear()
+            self._flushed_at = None
+        workers = cache.get(STATS_WORKERS_KEY, [])
+        cache.delete_many([
+            STATS_WORKERS_KEY,
+            *(STATS_KEY.format(worker=worker) for worker in workers),
+        ])
+
+
+query_stats = QueryStats()
+
+
+class QueryBudgetMiddleware:
+    """Считать запросы к базе по представлениям и проверять их бюджет.
+
+    Бюджеты задаются в settings.QUERY_BUDGETS по имени URL
+    («blog:index»). Превышение пишется в лог, а при
+    QUERY_BUDGET_RAISE = True (в тестах) вызывает QueryBudgetExceeded.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        if match is None:
+            return response
+        budget = getattr(settings, "QUERY_BUDGETS", {}).get(match.view_name)
+        over_budget = budget is not None and recorder.count > budget
+        query_stats.add(match.view_name, recorder, over_budget)
+        if over_budget:
+            message = (
+                f"{match.view_name}: {recorder.count} запросов к базе при "
+                f"бюджете {budget} ({request.method} {request.path})"
+            )
+            if getattr(settings, "QUERY_BUDGET_RAISE", False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
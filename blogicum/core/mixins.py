@@ -1,18 +1,247 @@
-from blog.models import Comment
-from core.constants import POST_ON_MAIN
-from core.utils import get_post_data
+import hashlib
+from calendar import timegm
+
+from blog.models import Comment, ImageJob
+from core.cache import INDEX_SCOPE, get_page_cache_key, get_versions
+from core.constants import PAGE_CACHE_TIMEOUT, POST_ON_MAIN
+from core.paginator import (CachedCountPaginator, CursorPaginator,
+                            InvalidCursor, encode_cursor, get_page_window)
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
 from django.shortcuts import redirect
 from django.urls import reverse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date, urlencode
 from django.views import View
 
 
 class MixinListView:
-    ordering = '-pub_date'
+    """Mixin для лент постов.
+
+    Первая страница пагинируется по номеру, дальнейшие переходы «вперёд» и
+    «назад» идут по курсорам `?after=` / `?before=`, которые выбирают
+    страницу по индексу (pub_date, id) без OFFSET. Общее количество
+    постов кешируется по ключу выборки (см. get_count_cache_key).
+    """
+
+    ordering = ('-pub_date', '-id')
     paginate_by = POST_ON_MAIN
+    paginator_class = CachedCountPaginator
+    count_approximate_above = None
+
+    def get_count_cache_key(self):
+        """Вернуть ключ кеша количества постов для этой выборки."""
+        filters = ":".join(
+            f"{key}={value}" for key, value in sorted(self.kwargs.items())
+        )
+        return f"{type(self).__name__}:{filters}"
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        return self.paginator_class(
+            queryset,
+            per_page,
+            cache_key=self.get_count_cache_key(),
+            approximate_above=self.count_approximate_above,
+            **kwargs,
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        after = self.request.GET.get("after")
+        before = self.request.GET.get("before")
+        if not (after or before):
+            paginator, page, object_list, is_paginated = (
+                super().paginate_queryset(queryset, page_size)
+            )
+            page.object_list = list(page.object_list)
+            page.page_window = get_page_window(page)
+            has_next = page.has_next() or (
+                paginator.count_is_approximate
+                and page.number == paginator.num_pages
+            )
+            if has_next and page.object_list:
+                page.next_cursor = encode_cursor(page.object_list[-1])
+            return paginator, page, page.object_list, is_paginated
+
+        paginator = CursorPaginator(queryset, page_size)
+        try:
+            page = paginator.page(after=after, before=before)
+        except InvalidCursor as error:
+            raise Http404(str(error))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class ConditionalGetMixin:
+    """Mixin условных GET-запросов (ETag / Last-Modified).
+
+    Валидатор считается до queryset'ов и шаблонов, поэтому повторный
+    запрос с If-None-Match / If-Modified-Since получает 304 без них.
+    По умолчанию ETag строится из поколений областей get_page_cache_scopes()
+    и адреса страницы — это не требует запросов к базе. В ETag входят
+    пользователь и CSRF-cookie: от них зависит разметка страницы.
+    """
+
+    def get_page_cache_scopes(self):
+        """Вернуть области кеша, от которых зависит страница."""
+        return (INDEX_SCOPE,)
 
+    def get_etag_parts(self):
+        """Вернуть части ETag или None, если страницу нельзя проверить."""
+        return [
+            *get_versions(*self.get_page_cache_scopes()),
+            self.request.get_full_path(),
+        ]
+
+    def get_last_modified(self):
+        """Вернуть время изменения страницы или None."""
+        return None
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return super().dispatch(request, *args, **kwargs)
+        parts = self.get_etag_parts()
+        if parts is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        parts = [
+            *parts,
+            request.user.get_username(),
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+        ]
+        etag = quote_etag(
+            hashlib.md5("|".join(map(str, parts)).encode()).hexdigest()
+        )
+        last_modified = self.get_last_modified()
+        timestamp = (
+            timegm(last_modified.utctimetuple()) if last_modified else None
+        )
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if not_modified is not None:
+            return not_modified
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            response.setdefault("ETag", etag)
+            if timestamp is not None:
+                response.setdefault("Last-Modified", http_date(timestamp))
+        return response
+
+
+class AnonymousPageCacheMixin:
+    """Mixin кеширования страницы целиком для анонимных читателей.
+
+    Ключ страницы — её путь с параметрами page_cache_params и поколения
+    областей из get_page_cache_scopes(). Изменения моделей сбрасывают
+    только затронутые области (см. blog.signals).
+    """
+
+    page_cache_timeout = PAGE_CACHE_TIMEOUT
+    # Параметры, от которых зависит страница; остальные в ключ не входят,
+    # чтобы запросы с произвольными ?x=1..N не вытесняли страницы из кеша.
+    page_cache_params = ("page", "after", "before")
+
+    def get_page_cache_path(self):
+        """Вернуть путь страницы с параметрами, влияющими на ответ."""
+        params = [
+            (name, self.request.GET[name])
+            for name in self.page_cache_params
+            if name in self.request.GET
+        ]
+        if not params:
+            return self.request.path
+        return f"{self.request.path}?{urlencode(params)}"
+
+    def get_page_cache_scopes(self):
+        """Вернуть области кеша, от которых зависит страница."""
+        return (INDEX_SCOPE,)
+
+    def dispatch(self, request, *args, **kwargs):
+        if (
+            request.method not in ("GET", "HEAD")
+            or request.user.is_authenticated
+        ):
+            return super().dispatch(request, *args, **kwargs)
 
-class CommentMixinView(LoginRequiredMixin, View):
+        key = get_page_cache_key(
+            self.get_page_cache_scopes(), self.get_page_cache_path()
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            def store(response):
+                cache.set(
+                    key,
+                    (response.content, response["Content-Type"]),
+                    self.page_cache_timeout,
+                )
+
+            if getattr(response, "is_rendered", True):
+                store(response)
+            else:
+                response.add_post_render_callback(store)
+        return response
+
+
+class ImageVariantsMixin:
+    """Ставить в очередь копии изображения, если в форме загружено новое.
+
+    Копии создаёт process_image_jobs вне запроса; до этого страницы
+    показывают оригинал.
+    """
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if "image" in form.changed_data:
+            if not self.object.image:
+                self.object.set_image_variants({})
+            elif (
+                self.object.image_variants.get("source")
+                != self.object.image.name
+            ):
+                # Загрузка того же содержимого даёт то же имя файла, и
+                # готовые копии остаются верными.
+                ImageJob.objects.enqueue(self.object)
+        return response
+
+
+class OwnerObjectMixin:
+    """Mixin правки и удаления объекта только его автором.
+
+    Объект выбирается один раз за запрос: проверка автора в dispatch и
+    обработчики generic-view работают с одним экземпляром. Чужой объект
+    перенаправляет на страницу поста из URL-параметра post_pk_url_kwarg.
+    """
+
+    post_pk_url_kwarg = "pk"
+    owned_object = None
+
+    def get_object(self, queryset=None):
+        if self.owned_object is None:
+            self.owned_object = super().get_object(queryset)
+        return self.owned_object
+
+    def check_object(self, obj):
+        """Проверить объект автора; по умолчанию проверок нет."""
+
+    def dispatch(self, request, *args, **kwargs):
+        obj = self.get_object()
+        if obj.author_id != request.user.pk:
+            return redirect(
+                "blog:post_detail",
+                pk=self.kwargs[self.post_pk_url_kwarg]
+            )
+        self.check_object(obj)
+        return super().dispatch(request, *args, **kwargs)
+
+
+class CommentMixinView(OwnerObjectMixin, LoginRequiredMixin, View):
     """Mixin для редактирования и удаления комментария.
 
     Атрибуты:
@@ -20,8 +249,9 @@ class CommentMixinView(LoginRequiredMixin, View):
         комментария.
 
     Методы:
-        - dispatch(request, *args, **kwargs): Проверяет, является ли
-        пользователь автором комментария.
+        - get_queryset(): Выбирает комментарии поста из URL вместе с
+        постом, чтобы проверить его видимость без отдельного запроса.
+        - check_object(comment): Проверяет, что пост виден читателям.
         - get_success_url(): Возвращает URL-адрес перенаправления после
         успешного редактирования или удаления комментария.
     """
@@ -29,16 +259,16 @@ class CommentMixinView(LoginRequiredMixin, View):
     model = Comment
     template_name = "blog/comment.html"
     pk_url_kwarg = "comment_pk"
-    post_pk_url_kwarg = 'pk'
 
-    def dispatch(self, request, *args, **kwargs):
-        if self.get_object().author != request.user:
-            return redirect(
-                "blog:post_detail",
-                pk=self.kwargs[self.pk_url_kwarg]
-            )
-        get_post_data(pk=kwargs.get('pk'))
-        return super().dispatch(request, *args, **kwargs)
+    def get_queryset(self):
+        return Comment.objects.select_related("post").filter(
+            post_id=self.kwargs[self.post_pk_url_kwarg]
+        )
+
+    def check_object(self, comment):
+        # Комментарии к скрытым постам не редактируются (см. get_post_data).
+        if not comment.post.is_visible:
+            raise Http404("Пост не найден.")
 
     def get_success_url(self):
         pk = self.kwargs[self.post_pk_url_kwarg]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
 
 
 class BaseModel(models.Model):
@@ -28,3 +30,97 @@ class BaseTitle(models.Model):
 
     class Meta:
         abstract = True
+
+
+class MediaBlobQuerySet(models.QuerySet):
+    """Учёт ссылок на файлы хранилища с именами по содержимому."""
+
+    def retain(self, name, size):
+        """Учесть ссылку на файл, создав его запись при необходимости.
+
+        Хранилище вызывает retain до того, как файл окажется на месте:
+        файл со ссылкой purge_unused не удалит, а если запись успели
+        удалить, она создаётся заново и файл записывается ещё раз.
+        """
+        while True:
+            if self.filter(name=name).update(refcount=F("refcount") + 1):
+                return
+            try:
+                with transaction.atomic(using=self.db):
+                    self.create(name=name, size=size, refcount=1)
+                return
+            except IntegrityError:
+                # Запись создала параллельная загрузка — учесть ссылку в ней.
+                continue
+
+    def cover(self, name, count):
+        """Поднять число ссылок на файл до count, если оно меньше.
+
+        Ссылки загрузок учтены в retain; так учитываются записи, которым
+        имя файла присвоили без загрузки. Число ссылок не уменьшается,
+        поэтому ссылки загрузок, ещё не сохранённых в записях, остаются.
+        """
+        self.filter(name=name).update(
+            refcount=Greatest("refcount", Value(count))
+        )
+
+    def release(self, name, storage):
+        """Уменьшить число ссылок и удалить файл, если ссылок не осталось.
+
+        Файл удаляется после фиксации транзакции: при откате ссылка на
+        него остаётся в базе.
+        """
+        if not name:
+            return
+        self.filter(name=name, refcount__gt=0).update(
+            refcount=F("refcount") - 1
+        )
+        transaction.on_commit(
+            lambda: self.purge_unused(name, storage), using=self.db
+        )
+
+    def purge_unused(self, name, storage):
+        """Удалить файл и его запись, если на него нет ссылок.
+
+        Условие refcount=0 проверяется самим DELETE, а файл удаляется до
+        конца транзакции: retain того же файла ждёт её и после этого
+        создаёт запись заново.
+        """
+        with transaction.atomic(using=self.db):
+            deleted, _ = self.filter(name=name, refcount=0).delete()
+            if deleted:
+                storage.delete(name)
+
+
+class MediaBlob(models.Model):
+    """Файл хранилища core.storage.HashedMediaStorage.
+
+    Одинаковые загрузки хранятся одним файлом; refcount — количество
+    записей, ссылающихся на него.
+    """
+
+    name = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name="Файл",
+    )
+    size = models.PositiveBigIntegerField(
+        verbose_name="Размер, байты",
+    )
+    refcount = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Ссылок",
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Добавлено",
+    )
+
+    objects = MediaBlobQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "файл"
+        verbose_name_plural = "Файлы"
+
+    def __str__(self):
+        return self.name
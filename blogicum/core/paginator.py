@@ -0,0 +1,175 @@
+import base64
+from collections.abc import Sequence
+from datetime import datetime
+
+from core.cache import get_versions, invalidate_on_commit
+from core.constants import PAGE_WINDOW, POST_COUNT_CACHE_TIMEOUT
+from django.core.cache import cache
+from django.core.paginator import InvalidPage, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+POST_COUNT_SCOPE = "post-count"
+
+
+class InvalidCursor(InvalidPage):
+    """Курсор страницы не удалось разобрать."""
+
+
+def encode_cursor(post):
+    """Вернуть непрозрачный курсор для позиции поста в ленте."""
+    raw = f"{post.pub_date.isoformat()}|{post.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Вернуть пару (pub_date, pk), закодированную в курсоре."""
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + padding).decode()
+        pub_date, pk = raw.split("|")
+        return datetime.fromisoformat(pub_date), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Неверный курсор страницы.")
+
+
+def invalidate_post_counts():
+    """Сбросить все закешированные количества постов после фиксации."""
+    invalidate_on_commit(POST_COUNT_SCOPE)
+
+
+def get_page_window(page):
+    """Вернуть номера страниц вокруг текущей для навигации."""
+    return range(
+        max(page.number - PAGE_WINDOW, 1),
+        min(page.number + PAGE_WINDOW, page.paginator.num_pages) + 1,
+    )
+
+
+class CachedCountPaginator(Paginator):
+    """Пагинатор, кеширующий общее количество объектов.
+
+    Атрибуты:
+        - cache_key: Ключ выборки (представление и фильтр); без него
+        количество считается каждый раз.
+        - approximate_above: Если задан, количество считается не дальше
+        этого значения, а страница с ним помечается приблизительной.
+    """
+
+    def __init__(
+        self, object_list, per_page, cache_key=None, approximate_above=None,
+        **kwargs
+    ):
+        super().__init__(object_list, per_page, **kwargs)
+        self.cache_key = cache_key
+        self.approximate_above = approximate_above
+        self.count_is_approximate = False
+
+    def _count_objects(self):
+        if self.approximate_above is None:
+            return self.object_list.count(), False
+        count = self.object_list[:self.approximate_above + 1].count()
+        if count > self.approximate_above:
+            return self.approximate_above, True
+        return count, False
+
+    @cached_property
+    def count(self):
+        if self.cache_key is None:
+            count, self.count_is_approximate = self._count_objects()
+            return count
+        version, = get_versions(POST_COUNT_SCOPE)
+        key = f"{POST_COUNT_SCOPE}:{version}:{self.cache_key}"
+        cached = cache.get(key)
+        if cached is None:
+            cached = self._count_objects()
+            cache.set(key, cached, timeout=POST_COUNT_CACHE_TIMEOUT)
+        count, self.count_is_approximate = cached
+        return count
+
+
+class CursorPage(Sequence):
+    """Страница ленты, выбранная по курсору."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f"<CursorPage: {len(self.object_list)} objects>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return encode_cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return encode_cursor(self.object_list[0])
+
+
+class CursorPaginator:
+    """Пагинатор ленты по ключу (pub_date, id).
+
+    Вместо OFFSET страница выбирается условием относительно последней
+    (или первой) записи предыдущей страницы, поэтому стоимость запроса
+    не зависит от глубины страницы.
+    """
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+
+    def get_queryset(self, after=None, before=None):
+        """Вернуть выборку, начинающуюся сразу за курсором.
+
+        Условие по pub_date вынесено отдельно от составного сравнения,
+        чтобы SQLite начал обход индекса с позиции курсора, а не с начала
+        ленты. Выборка для `before` идёт в обратном порядке.
+        """
+        if before:
+            pub_date, pk = decode_cursor(before)
+            return self.object_list.filter(
+                Q(pub_date__gt=pub_date) | Q(pk__gt=pk),
+                pub_date__gte=pub_date,
+            ).order_by("pub_date", "pk")
+        query_set = self.object_list.order_by("-pub_date", "-pk")
+        if after:
+            pub_date, pk = decode_cursor(after)
+            query_set = query_set.filter(
+                Q(pub_date__lt=pub_date) | Q(pk__lt=pk),
+                pub_date__lte=pub_date,
+            )
+        return query_set
+
+    def page(self, after=None, before=None):
+        """Вернуть страницу после курсора `after` или перед `before`."""
+        rows = list(
+            self.get_queryset(after, before)[:self.per_page + 1]
+        )
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if before:
+            return CursorPage(
+                rows[::-1], has_next=True, has_previous=has_more
+            )
+        return CursorPage(rows, has_next=has_more, has_previous=bool(after))
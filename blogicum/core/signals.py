@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Посты стали видны читателям или скрылись из лент.
+# Аргументы: post_ids — идентификаторы постов, visible — новое состояние.
+post_visibility_changed = Signal()
@@ -0,0 +1,127 @@
+import hashlib
+import os
+import re
+import tempfile
+from contextvars import ContextVar
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+from core.models import MediaBlob
+
+# Имя файла по содержимому: <каталог>/ab/cd/abcd…(64 знака).<расширение>.
+HASHED_NAME = re.compile(
+    r"(?:^|/)(?P<a>[0-9a-f]{2})/(?P<b>[0-9a-f]{2})/"
+    r"(?P=a)(?P=b)[0-9a-f]{60}(?:\.\w+)?$"
+)
+
+
+# Файлы, сохранённые в этом контексте, чью ссылку ещё не забрала запись
+# (см. take_upload); имя повторяется столько раз, сколько было сохранений.
+_unclaimed_uploads = ContextVar("unclaimed_uploads", default=())
+
+
+def take_upload(name):
+    """Забрать ссылку, учтённую при сохранении файла name в этом контексте.
+
+    Вернуть True, если такое сохранение было: его ссылка переходит к
+    записи, в которую попало имя файла.
+    """
+    uploads = list(_unclaimed_uploads.get())
+    if name not in uploads:
+        return False
+    uploads.remove(name)
+    _unclaimed_uploads.set(tuple(uploads))
+    return True
+
+
+def is_hashed_name(name):
+    """Вернуть True, если имя файла задано его содержимым."""
+    return bool(HASHED_NAME.search(name))
+
+
+def hashed_name(directory, digest, extension):
+    """Вернуть имя файла в каталоге с разбиением по двум уровням."""
+    return "/".join(
+        part for part in (
+            directory, digest[:2], digest[2:4], digest + extension
+        ) if part
+    )
+
+
+@deconstructible
+class HashedMediaStorage(FileSystemStorage):
+    """Хранилище, где имя файла — SHA-256 его содержимого.
+
+    Файлы раскладываются по вложенным каталогам по первым знакам хеша,
+    чтобы в одном каталоге их было немного, а одинаковые загрузки
+    записываются один раз. Ссылки на файлы считает core.models.MediaBlob;
+    каждое сохранение файла учитывает одну ссылку.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Имя определяется содержимым в _save, и одинаковое содержимое
+        # должно попасть в тот же файл, а не получить суффикс.
+        return name
+
+    def _makedirs(self, directory):
+        if self.directory_permissions_mode is None:
+            os.makedirs(directory, exist_ok=True)
+            return
+        old_umask = os.umask(0)
+        try:
+            os.makedirs(
+                directory, self.directory_permissions_mode, exist_ok=True
+            )
+        finally:
+            os.umask(old_umask)
+
+    def _save(self, name, content):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        full_directory = self.path(directory)
+        self._makedirs(full_directory)
+        # Хеш считается при записи во временный файл рядом с целевым,
+        # поэтому содержимое читается один раз и не держится в памяти.
+        descriptor, temp_path = tempfile.mkstemp(
+            dir=full_directory, prefix=".upload-"
+        )
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(descriptor, "wb") as temp:
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    temp.write(chunk)
+                    size += len(chunk)
+            name = hashed_name(directory, digest.hexdigest(), extension)
+            # Ссылка учитывается до проверки файла: пока она есть,
+            # MediaBlob.objects.purge_unused файл не удалит.
+            MediaBlob.objects.retain(name, size)
+            try:
+                self._place(temp_path, self.path(name))
+            except BaseException:
+                MediaBlob.objects.release(name, self)
+                raise
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        _unclaimed_uploads.set((*_unclaimed_uploads.get(), name))
+        return name
+
+    def _place(self, temp_path, full_path):
+        if os.path.exists(full_path):
+            os.remove(temp_path)
+            return
+        self._makedirs(os.path.dirname(full_path))
+        if self.file_permissions_mode is not None:
+            os.chmod(temp_path, self.file_permissions_mode)
+        # Замена атомарна: параллельная загрузка того же содержимого
+        # запишет такой же файл.
+        os.replace(temp_path, full_path)
+
+
+hashed_storage = HashedMediaStorage()
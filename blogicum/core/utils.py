@@ -1,7 +1,12 @@
+import re
+
 from blog.models import Post
-from django.db.models import Count
+from django.db import connection
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
-from django.utils import timezone
+
+# Слово поискового запроса; кавычки и операторы FTS5 в него не входят.
+SEARCH_TERM = re.compile(r"\w+")
 
 
 def get_all_posts_queryset():
@@ -12,19 +17,22 @@ def get_all_posts_queryset():
             "location",
             "author",
         )
-        .annotate(comment_count=Count("comments"))
-        .order_by("-pub_date")
+        .order_by("-pub_date", "-id")
     )
     return query_set
 
 
+def get_post_cards_queryset():
+    """Вернуть посты для карточек ленты.
+
+    Карточке нужен только отрывок, поэтому полный текст не загружается.
+    """
+    return get_all_posts_queryset().defer("text")
+
+
 def get_post_published_query():
     """Вернуть опубликованные посты."""
-    query_set = get_all_posts_queryset().filter(
-        pub_date__lte=timezone.now(),
-        is_published=True,
-        category__is_published=True,
-    )
+    query_set = get_all_posts_queryset().filter(is_visible=True)
     return query_set
 
 
@@ -38,12 +46,34 @@ def get_post_data(pk):
         - Пост опубликован.
         - Категория в которой находится поста опубликована.
         - Дата поста не больше текущей даты.
+    Все три условия хранятся в поле is_visible.
     """
-    queryset = Post.objects.filter(
-        pub_date__lte=timezone.now(),
-        is_published=True,
-        category__is_published=True,
-    )
-    post = get_object_or_404(queryset, pk=pk)
+    post = get_object_or_404(Post.objects.visible(), pk=pk)
 
     return post
+
+
+def make_search_query(text):
+    """Вернуть запрос FTS5: все слова текста, каждое как префикс."""
+    return " ".join(f'"{term}"*' for term in SEARCH_TERM.findall(text))
+
+
+def search_posts(query_set, text):
+    """Вернуть посты выборки, найденные по тексту, по релевантности.
+
+    В SQLite поиск идёт по индексу FTS5 (blog.models.PostSearch); в других
+    базах, где индекса нет, — по вхождению всех слов в заголовок или
+    текст.
+    """
+    terms = SEARCH_TERM.findall(text)
+    if not terms:
+        return query_set.none()
+    if connection.vendor != "sqlite":
+        for term in terms:
+            query_set = query_set.filter(
+                Q(title__icontains=term) | Q(text__icontains=term)
+            )
+        return query_set
+    return query_set.filter(
+        search_entry__document__match=make_search_query(text)
+    ).order_by("search_entry__rank", "-pub_date", "-id")
@@ -0,0 +1,63 @@
+from core.export import EXPORT_FORMATS, iter_export, parse_bound
+from core.media import serve_media
+from core.middleware import query_stats
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth.decorators import user_passes_test
+from django.http import (HttpResponseBadRequest, JsonResponse,
+                         StreamingHttpResponse)
+from django.utils import timezone
+from django.views.decorators.http import require_safe
+
+
+@staff_member_required
+def query_stats_view(request):
+    """Вернуть сводку запросов к базе по представлениям."""
+    return JsonResponse(
+        query_stats.summary(), json_dumps_params={"ensure_ascii": False}
+    )
+
+
+@user_passes_test(
+    lambda user: user.is_active and user.is_superuser,
+    login_url="admin:login",
+)
+def export_view(request):
+    """Отдать выгрузку блога потоком; только суперпользователям.
+
+    Параметры: format (jsonl или json), since, until, category —
+    как у команды export_blog.
+    """
+    export_format = request.GET.get("format", "jsonl")
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest("Неизвестный формат выгрузки.")
+    try:
+        since = parse_bound(request.GET.get("since"))
+        until = parse_bound(request.GET.get("until"))
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    response = StreamingHttpResponse(
+        iter_export(
+            export_format,
+            since=since,
+            until=until,
+            category=request.GET.get("category"),
+        ),
+        content_type=(
+            "application/json" if export_format == "json"
+            else "application/x-ndjson"
+        ),
+    )
+    stamp = timezone.now().strftime("%Y%m%d-%H%M%S")
+    response["Content-Disposition"] = (
+        f'attachment; filename="blogicum-{stamp}.{export_format}"'
+    )
+    return response
+
+
+@require_safe
+def media_view(request, path):
+    """Отдать загруженный файл способом из settings.MEDIA_SERVE_MODE."""
+    return serve_media(
+        request, path, getattr(settings, "MEDIA_SERVE_MODE", "file")
+    )
@@ -1,3 +1,4 @@
+import copy
 import os
 import re
 import time
@@ -9,6 +10,7 @@ from typing import (Any, Iterable, List, NamedTuple, Optional, Tuple, Type,
 
 import pytest
 from django.apps import apps
+from django.conf import settings as django_settings
 from django.contrib.auth import get_user_model
 from django.db.models import Field, Model
 from django.forms import BaseForm
@@ -32,6 +34,42 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def enforce_query_budgets():
+    with override_settings(QUERY_BUDGET_RAISE=True):
+        yield
+
+
+@pytest.fixture(scope="session", autouse=True)
+def cache_dir(tmp_path_factory):
+    """Держать файловый кеш тестов вне каталога кеша разработчика.
+
+    Модули тестов берут кеш через caches["default"] внутри тестов: прокси
+    cache, импортированный на уровне модуля, pytest при сборе тестов
+    опрашивает раньше этой фикстуры, и кеш создаёт каталог по настройкам.
+    """
+    location = str(tmp_path_factory.mktemp("cache"))
+    caches = copy.deepcopy(django_settings.CACHES)
+    caches["default"]["LOCATION"] = location
+    with override_settings(CACHES=caches):
+        yield location
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(cache_dir):
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    """Сохранять загруженные файлы во временный каталог теста."""
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -0,0 +1,105 @@
+import pytest
+from core.constants import ADMIN_COMMENTS_PER_PAGE
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+CHANGELIST_URL = "/admin/blog/post/"
+
+
+def _changelist_queries(client, **params):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(CHANGELIST_URL, params)
+    assert response.status_code == 200
+    return len(queries)
+
+
+def test_post_changelist_queries_do_not_grow(
+        mixer, admin_client, published_category, published_location
+):
+    def add_posts(count):
+        for author in mixer.cycle(count).blend("auth.User"):
+            mixer.blend(
+                "blog.Post", author=author, category=published_category,
+                location=published_location,
+            )
+
+    add_posts(2)
+    few = _changelist_queries(admin_client)
+    add_posts(120)
+    many = _changelist_queries(admin_client)
+    assert many == few, (
+        "Убедитесь, что число запросов списка постов в админке не зависит"
+        " от количества постов и пользователей."
+    )
+
+
+def test_post_changelist_filters_by_author_username(
+        mixer, admin_client, published_category
+):
+    author, other = mixer.cycle(2).blend("auth.User")
+    post = mixer.blend(
+        "blog.Post", author=author, category=published_category
+    )
+    mixer.blend("blog.Post", author=other, category=published_category)
+    response = admin_client.get(CHANGELIST_URL, {"author": author.username})
+    assert list(response.context["cl"].result_list) == [post], (
+        "Убедитесь, что фильтр по автору в админке отбирает посты по имени"
+        " пользователя."
+    )
+    assert other.username not in response.content.decode(), (
+        "Убедитесь, что боковая панель админки не выводит список всех"
+        " пользователей."
+    )
+
+
+def _change_form(client, post, **params):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(f"{CHANGELIST_URL}{post.pk}/change/", params)
+    assert response.status_code == 200
+    return response, len(queries)
+
+
+def test_post_change_form_paginates_comments(
+        mixer, admin_client, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post)
+    # Первый запрос заполняет кеш типов содержимого.
+    _change_form(admin_client, post)
+    _, few = _change_form(admin_client, post)
+    mixer.cycle(117).blend(
+        "blog.Comment", post=post, author=mixer.SELECT
+    )
+    response, many = _change_form(admin_client, post)
+    formset = response.context["inline_admin_formsets"][0].formset
+    assert len(formset.forms) == ADMIN_COMMENTS_PER_PAGE, (
+        "Убедитесь, что форма поста в админке показывает комментарии"
+        " постранично."
+    )
+    assert many == few, (
+        "Убедитесь, что число запросов формы поста в админке не зависит"
+        " от количества комментариев."
+    )
+    response, _ = _change_form(admin_client, post, comments_page=3)
+    formset = response.context["inline_admin_formsets"][0].formset
+    assert len(formset.forms) == 120 - 2 * ADMIN_COMMENTS_PER_PAGE, (
+        "Убедитесь, что параметр comments_page выбирает страницу"
+        " комментариев."
+    )
+
+
+def test_post_change_form_uses_autocomplete_widgets(
+        admin_client, post_with_published_location
+):
+    response, _ = _change_form(admin_client, post_with_published_location)
+    form = response.context["adminform"].form
+    for name in ("author", "location", "category"):
+        assert isinstance(
+            form.fields[name].widget.widget, AutocompleteSelect
+        ), (
+            f"Убедитесь, что поле `{name}` формы поста в админке"
+            " использует autocomplete, а не полный список."
+        )
@@ -0,0 +1,32 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.cache import caches
+from django.core.management import call_command
+
+from core.management.commands.bench_blog import BASELINE
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+def test_bench_blog_smoke():
+    caches["default"].set("site-page", "cached")
+    stdout = StringIO()
+    # Время на другой машине не сравнить с сохранённым, а количество
+    # запросов не зависит от неё.
+    call_command(
+        "bench_blog", sizes=[20], repeat=1, baseline=BASELINE, threshold=1000,
+        stdout=stdout, stderr=StringIO(),
+    )
+    results = json.loads(stdout.getvalue())
+    assert set(results["20"]) == {
+        "index", "category", "profile", "post_detail", "create_post",
+        "edit_post", "add_comment", "edit_comment", "delete_comment",
+    }
+    assert set(results["20"]["index"]) == {
+        "p50_ms", "p95_ms", "queries", "peak_kb",
+    }
+    assert caches["default"].get("site-page") == "cached", (
+        "Убедитесь, что замеры не очищают общий кеш сайта."
+    )
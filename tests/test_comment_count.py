@@ -0,0 +1,94 @@
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _stored_count(post):
+    post.refresh_from_db(fields=["comment_count"])
+    return post.comment_count
+
+
+def test_comment_count_follows_comments(
+        mixer, post_with_published_location, another_user
+):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend(
+        "blog.Comment", post=post, author=another_user
+    )
+    assert _stored_count(post) == 3, (
+        "Убедитесь, что при создании комментария увеличивается счётчик"
+        " комментариев поста."
+    )
+
+    comments[0].delete()
+    assert _stored_count(post) == 2
+
+    post.comments.all().delete()
+    assert _stored_count(post) == 0, (
+        "Убедитесь, что массовое удаление комментариев пересчитывает"
+        " счётчик комментариев поста."
+    )
+
+
+def test_comment_count_bulk_and_cascade(
+        mixer, post_with_published_location, another_user
+):
+    from blog.models import Comment
+
+    post = post_with_published_location
+    Comment.objects.bulk_create(
+        Comment(post=post, author=another_user, text=f"Комментарий {i}")
+        for i in range(5)
+    )
+    assert _stored_count(post) == 5
+
+    another_user.delete()
+    assert _stored_count(post) == 0
+
+
+def test_stale_post_save_keeps_comment_count(
+        mixer, post_with_published_location, another_user
+):
+    post = post_with_published_location
+    mixer.blend("blog.Comment", post=post, author=another_user)
+    post.title = "Новый заголовок"
+    post.save()
+    assert _stored_count(post) == 1, (
+        "Убедитесь, что сохранение поста не перезаписывает счётчик"
+        " комментариев устаревшим значением."
+    )
+
+
+def test_recount_comments_command(
+        mixer, post_with_published_location, another_user
+):
+    from blog.models import Post
+
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post, author=another_user)
+    Post.objects.filter(pk=post.pk).update(comment_count=7)
+    call_command("recount_comments")
+    assert _stored_count(post) == 2
+
+
+def test_recount_comments_keeps_consistent_posts(
+        mixer, post_with_published_location, another_user
+):
+    from blog.models import Post
+
+    drifted = post_with_published_location
+    consistent = mixer.blend(
+        "blog.Post", author=drifted.author, category=drifted.category
+    )
+    mixer.blend("blog.Comment", post=consistent, author=another_user)
+    Post.objects.filter(pk=drifted.pk).update(comment_count=7)
+    updated_at = Post.objects.get(pk=consistent.pk).updated_at
+
+    call_command("recount_comments")
+
+    assert _stored_count(drifted) == 0
+    assert Post.objects.get(pk=consistent.pk).updated_at == updated_at, (
+        "Убедитесь, что команда recount_comments не изменяет посты,"
+        " у которых счётчик комментариев верен."
+    )
@@ -0,0 +1,139 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from core.cache import INDEX_SCOPE, get_versions, invalidate
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _revalidate(client, url):
+    etag = client.get(url)["ETag"]
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    return response, len(context.captured_queries)
+
+
+def test_detail_not_modified(user_client, post_with_published_location):
+    url = f"/posts/{post_with_published_location.id}/"
+    first = user_client.get(url)
+    assert first.status_code == 200
+    assert first.has_header("Last-Modified")
+
+    response, queries = _revalidate(user_client, url)
+    assert response.status_code == 304, (
+        "Убедитесь, что повторный запрос страницы поста с If-None-Match"
+        " получает ответ 304."
+    )
+    assert queries <= 3, (
+        "Убедитесь, что ответ 304 не строит queryset'ы и шаблон страницы."
+    )
+
+    response = user_client.get(
+        url, HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+    )
+    assert response.status_code == 304
+
+
+def test_detail_changes_after_comment(
+        mixer, user_client, another_user, post_with_published_location
+):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    etag = user_client.get(url)["ETag"]
+
+    comment = mixer.blend("blog.Comment", post=post, author=another_user)
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Убедитесь, что новый комментарий меняет ETag страницы поста."
+    )
+
+    etag = response["ETag"]
+    comment.text = "Исправленный комментарий"
+    comment.save()
+    assert user_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_etag_depends_on_user(
+        user_client, another_user_client, post_with_published_location
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    etag = user_client.get(url)["ETag"]
+    response = another_user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Убедитесь, что ETag страницы зависит от пользователя."
+    )
+
+
+@pytest.mark.parametrize("url_name", ["index", "category", "profile"])
+def test_list_not_modified_until_post_changes(
+        user, unlogged_client, post_with_published_location, url_name,
+        django_capture_on_commit_callbacks,
+):
+    post = post_with_published_location
+    url = {
+        "index": "/",
+        "category": f"/category/{post.category.slug}/",
+        "profile": f"/profile/{user.username}/",
+    }[url_name]
+
+    response, queries = _revalidate(unlogged_client, url)
+    assert response.status_code == 304
+    assert queries == 0, (
+        "Убедитесь, что проверка ETag ленты не обращается к базе данных."
+    )
+
+    etag = unlogged_client.get(url)["ETag"]
+    post.title = "Новый заголовок"
+    with django_capture_on_commit_callbacks(execute=True):
+        post.save()
+    response = unlogged_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Убедитесь, что изменение поста меняет ETag ленты."
+    )
+
+
+def test_list_etag_follows_invalidation_from_other_process(
+        unlogged_client, post_with_published_location, cache_dir
+):
+    etag = unlogged_client.get("/")["ETag"]
+    # Сброс из другого процесса, как из publish_scheduled или воркера.
+    subprocess.run(
+        [
+            sys.executable, "-c",
+            "import django; django.setup(); "
+            "from core.cache import INDEX_SCOPE, invalidate; "
+            "invalidate(INDEX_SCOPE)",
+        ],
+        cwd=settings.BASE_DIR,
+        env={
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": "blogicum.settings",
+            "BLOGICUM_CACHE_DIR": cache_dir,
+        },
+        check=True,
+    )
+    response = unlogged_client.get("/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Убедитесь, что поколения кеша хранятся в общем для процессов"
+        " кеше."
+    )
+
+
+def test_invalidated_generation_does_not_expire(monkeypatch):
+    get_versions(INDEX_SCOPE)
+    invalidate(INDEX_SCOPE)
+    version = get_versions(INDEX_SCOPE)[0]
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 24 * 60 * 60)
+    assert caches["default"].get(f"version:{INDEX_SCOPE}") == version, (
+        "Убедитесь, что поколение области после сброса хранится"
+        " бессрочно."
+    )
@@ -0,0 +1,64 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        client.get(url)
+    return [
+        query["sql"] for query in context.captured_queries
+        if query["sql"].startswith("SELECT COUNT(*)")
+    ]
+
+
+def test_list_count_is_cached(
+        mixer, unlogged_client, many_posts_with_published_locations,
+        django_capture_on_commit_callbacks,
+):
+    assert len(_count_queries(unlogged_client, "/")) == 1
+    assert not _count_queries(unlogged_client, "/"), (
+        "Убедитесь, что количество постов ленты берётся из кеша."
+    )
+
+    post = many_posts_with_published_locations[0]
+    post.is_published = False
+    with django_capture_on_commit_callbacks(execute=True):
+        post.save()
+    assert len(_count_queries(unlogged_client, "/")) == 1, (
+        "Убедитесь, что изменение поста сбрасывает закешированное"
+        " количество постов."
+    )
+    response = unlogged_client.get("/?page=2")
+    assert response.context["paginator"].count == len(
+        many_posts_with_published_locations
+    ) - 1
+
+
+def test_profile_count_depends_on_viewer(
+        user, user_client, unlogged_client,
+        unpublished_posts_with_published_locations
+):
+    url = f"/profile/{user.username}/"
+    owner_count = user_client.get(url).context["paginator"].count
+    public_count = unlogged_client.get(url).context["paginator"].count
+    assert owner_count == len(unpublished_posts_with_published_locations)
+    assert public_count == 0
+
+
+def test_approximate_count(
+        monkeypatch, unlogged_client, many_posts_with_published_locations
+):
+    from blog.views import MainPostListView
+
+    monkeypatch.setattr(MainPostListView, "count_approximate_above", 15)
+    response = unlogged_client.get("/?page=2")
+    paginator = response.context["paginator"]
+    assert paginator.count == 15
+    assert paginator.count_is_approximate
+    assert response.context["page_obj"].next_cursor, (
+        "Убедитесь, что с последней «приблизительной» страницы можно"
+        " перейти дальше по курсору."
+    )
@@ -0,0 +1,51 @@
+import pytest
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _page_ids(response):
+    return [post.id for post in response.context["page_obj"]]
+
+
+@pytest.mark.parametrize("url_name", ["index", "category", "profile"])
+def test_cursor_pages(
+        user, user_client, many_posts_with_published_locations, url_name
+):
+    category = many_posts_with_published_locations[0].category
+    url = {
+        "index": "/",
+        "category": f"/category/{category.slug}/",
+        "profile": f"/profile/{user.username}/",
+    }[url_name]
+
+    first = user_client.get(url)
+    first_ids = _page_ids(first)
+    next_cursor = first.context["page_obj"].next_cursor
+    assert next_cursor, (
+        "Убедитесь, что на первой странице ленты есть курсор следующей"
+        " страницы."
+    )
+
+    second = user_client.get(url, {"after": next_cursor})
+    assert second.status_code == 200
+    second_page = second.context["page_obj"]
+    second_ids = _page_ids(second)
+    assert len(second_ids) == N_PER_PAGE
+    assert not set(first_ids) & set(second_ids), (
+        "Убедитесь, что страница по курсору `after` не повторяет посты"
+        " предыдущей страницы."
+    )
+    pub_dates = [post.pub_date for post in second_page]
+    assert pub_dates == sorted(pub_dates, reverse=True)
+    assert not second_page.has_next()
+
+    back = user_client.get(url, {"before": second_page.previous_cursor})
+    assert _page_ids(back) == first_ids, (
+        "Убедитесь, что курсор `before` возвращает на предыдущую страницу."
+    )
+
+
+def test_invalid_cursor(user_client, many_posts_with_published_locations):
+    response = user_client.get("/", {"after": "not-a-cursor"})
+    assert response.status_code == 404
@@ -0,0 +1,37 @@
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_excerpt_saved_with_post(post_with_published_location):
+    post = post_with_published_location
+    post.text = " ".join(f"слово{i}" for i in range(30))
+    post.save(update_fields=["text"])
+    post.refresh_from_db()
+    assert post.excerpt == " ".join(
+        f"слово{i}" for i in range(10)
+    ) + " …", (
+        "Убедитесь, что отрывок поста пересчитывается при сохранении текста."
+    )
+
+
+def test_card_uses_excerpt_without_text(
+        user_client, post_with_published_location
+):
+    response = user_client.get("/")
+    post = response.context["page_obj"][0]
+    assert "text" in post.get_deferred_fields(), (
+        "Убедитесь, что лента не загружает полный текст постов."
+    )
+    assert post.excerpt in response.content.decode("utf-8")
+
+
+def test_backfill_excerpts_command(post_with_published_location):
+    from blog.models import Post
+
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(excerpt="")
+    call_command("backfill_excerpts")
+    post.refresh_from_db()
+    assert post.excerpt == post.make_excerpt()
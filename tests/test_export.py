@@ -0,0 +1,77 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _export(**options):
+    output = io.StringIO()
+    call_command("export_blog", chunk_size=2, stdout=output, **options)
+    return output.getvalue()
+
+
+def test_fixture_export_contains_everything(
+        mixer, another_user, post_with_published_location,
+        post_with_another_category
+):
+    mixer.cycle(3).blend(
+        "blog.Comment", post=post_with_published_location,
+        author=another_user,
+    )
+    items = json.loads(_export(format="json"))
+    models = [item["model"] for item in items]
+    assert models.count("blog.post") == 2
+    assert models.count("blog.comment") == 3, (
+        "Убедитесь, что выгрузка проходит все пачки объектов."
+    )
+    assert models.index("auth.user") < models.index("blog.post"), (
+        "Убедитесь, что модели выгружаются в порядке зависимостей."
+    )
+
+
+def test_jsonl_export_filters_by_category(
+        post_with_published_location, post_with_another_category
+):
+    category = post_with_another_category.category
+    items = [
+        json.loads(line)
+        for line in _export(category=category.slug).splitlines()
+    ]
+    posts = [item for item in items if item["model"] == "blog.post"]
+    categories = [item for item in items if item["model"] == "blog.category"]
+    assert [post["pk"] for post in posts] == [post_with_another_category.pk]
+    assert [item["pk"] for item in categories] == [category.pk], (
+        "Убедитесь, что при фильтре выгружаются только связанные объекты."
+    )
+
+
+def test_export_view_is_superuser_only(
+        mixer, client, user_client, post_with_published_location
+):
+    assert user_client.get("/export/").status_code == 302
+    client.force_login(mixer.blend("auth.User", is_staff=True))
+    assert client.get("/export/").status_code == 302, (
+        "Убедитесь, что выгрузка доступна только суперпользователям."
+    )
+    client.force_login(
+        mixer.blend("auth.User", is_staff=True, is_superuser=True)
+    )
+    response = client.get("/export/", {"format": "json"})
+    assert response.streaming, (
+        "Убедитесь, что выгрузка отдаётся потоком StreamingHttpResponse."
+    )
+    content = b"".join(response.streaming_content).decode("utf-8")
+    items = json.loads(content)
+    assert any(item["model"] == "blog.post" for item in items)
+    for item in items:
+        if item["model"] == "auth.user":
+            assert not {"password", "groups", "user_permissions"} & set(
+                item["fields"]
+            ), (
+                "Убедитесь, что выгрузка не содержит хеши паролей и права"
+                " пользователей."
+            )
+    assert client.get("/export/", {"since": "вчера"}).status_code == 400
@@ -0,0 +1,33 @@
+import pytest
+from django.core.management import CommandError, call_command
+from django.db.models import Sum
+
+pytestmark = [pytest.mark.django_db]
+
+OPTIONS = dict(
+    users=5, categories=3, locations=2, posts=60, comments=100, seed=7,
+    batch_size=16, scheduled=0.2, unpublished=0.3,
+)
+
+
+def test_generated_posts_are_consistent():
+    from blog.models import Post
+
+    call_command("generate_data", **OPTIONS)
+    assert Post.objects.count() == OPTIONS["posts"]
+    assert (
+        Post.objects.aggregate(total=Sum("comment_count"))["total"]
+        == OPTIONS["comments"]
+    ), "Убедитесь, что счётчики комментариев сгенерированных постов верны."
+    for post in Post.objects.select_related("category"):
+        assert post.is_visible == post.check_visibility(), (
+            "Убедитесь, что генератор заполняет видимость постов так же,"
+            " как Post.save."
+        )
+        assert post.excerpt == post.make_excerpt()
+
+
+def test_same_seed_is_rejected():
+    call_command("generate_data", **OPTIONS)
+    with pytest.raises(CommandError):
+        call_command("generate_data", **OPTIONS)
@@ -0,0 +1,206 @@
+import os
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.utils import timezone
+from PIL import Image
+
+from blog.models import ImageJob, ImageJobQuerySet
+from core.cache import INDEX_SCOPE, author_scope, category_scope, get_versions
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("media_root")]
+
+
+def _image_bytes(size, mode="RGB", fmt="JPEG"):
+    buffer = BytesIO()
+    Image.new(mode, size).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def test_uploaded_image_gets_variants(
+        user, user_client, published_category
+):
+    response = user_client.post("/posts/create/", {
+        "title": "Горы",
+        "text": "Вид с перевала.",
+        "pub_date": timezone.now().strftime("%Y-%m-%d %H:%M"),
+        "category": published_category.pk,
+        "is_published": "on",
+        "image": SimpleUploadedFile(
+            "mountains.jpg", _image_bytes((1600, 800)),
+            content_type="image/jpeg",
+        ),
+    })
+    assert response.status_code == 302
+    post = user.authors.get()
+    job = post.image_jobs.get()
+    assert (job.status, job.source) == ("pending", post.image.name), (
+        "Убедитесь, что загрузка изображения ставит задачу в очередь, а"
+        " не создаёт копии во время запроса."
+    )
+    content = user_client.get(f"/posts/{post.pk}/").content.decode()
+    assert post.image.url in content and "srcset" not in content, (
+        "Убедитесь, что до создания копий страница показывает оригинал."
+    )
+
+    call_command("process_image_jobs", workers=0, stdout=StringIO())
+    post.refresh_from_db()
+    job.refresh_from_db()
+    assert job.status == "done"
+    variants = post.image_variants
+    assert (variants["width"], variants["height"]) == (1600, 800)
+    assert [
+        (variant["width"], variant["height"])
+        for variant in variants["variants"]
+    ] == [(320, 160), (640, 320), (1280, 640)], (
+        "Убедитесь, что для изображения создаются копии фиксированной"
+        " ширины с сохранением пропорций."
+    )
+    for variant in variants["variants"]:
+        assert default_storage.exists(variant["name"])
+
+    content = user_client.get(f"/posts/{post.pk}/").content.decode()
+    assert f'srcset="{post.image_srcset}"' in content
+    assert post.image_srcset.count("w, ") == 3
+    profile = user_client.get(f"/profile/{user.username}/").content.decode()
+    assert 'loading="lazy"' in profile, (
+        "Убедитесь, что изображения в карточках постов загружаются"
+        " отложенно."
+    )
+
+
+def test_backfill_image_variants(mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category, image=""
+    )
+    post.image.save(
+        "logo.png", ContentFile(_image_bytes((800, 600), "RGBA", "PNG"))
+    )
+    small = mixer.blend(
+        "blog.Post", author=user, category=published_category, image=""
+    )
+    small.image.save("small.jpg", ContentFile(_image_bytes((200, 100))))
+    assert post.image_srcset == ""
+
+    call_command("backfill_image_variants", stdout=StringIO())
+    # Пул процессов: обработчики наследуют MEDIA_ROOT теста.
+    call_command("process_image_jobs", workers=1, stdout=StringIO())
+    post.refresh_from_db()
+    small.refresh_from_db()
+    assert [
+        variant["name"].rsplit(".", 1)[-1]
+        for variant in post.image_variants["variants"]
+    ] == ["png", "png"], (
+        "Убедитесь, что backfill_image_variants создаёт копии уже"
+        " загруженных изображений, сохраняя прозрачность."
+    )
+    assert small.image_variants["variants"] == []
+    assert small.image_srcset == f"{small.image.url} 200w"
+
+
+def test_stale_image_job_discards_variants(
+        mixer, user, published_category
+):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category, image=""
+    )
+    post.image.save("first.jpg", ContentFile(_image_bytes((800, 400))))
+    variants_dir = os.path.join(os.path.dirname(post.image.name), "variants")
+    ImageJob.objects.enqueue(post)
+    post.image.save("second.jpg", ContentFile(_image_bytes((900, 400))))
+    call_command("process_image_jobs", workers=0, stdout=StringIO())
+    post.refresh_from_db()
+    assert post.image_variants == {}
+    assert not default_storage.listdir(variants_dir)[1], (
+        "Убедитесь, что копии заменённого изображения удаляются."
+    )
+
+
+def test_failed_image_job_is_retried(mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category, image=""
+    )
+    post.image.save("broken.jpg", ContentFile(b"not an image"))
+    job = ImageJob.objects.enqueue(post)
+    call_command(
+        "process_image_jobs", workers=0, stdout=StringIO(), stderr=StringIO()
+    )
+    job.refresh_from_db()
+    assert (job.status, job.attempts) == ("failed", 3) and job.error, (
+        "Убедитесь, что задача с ошибкой повторяется и закрывается после"
+        " IMAGE_JOB_MAX_ATTEMPTS попыток."
+    )
+
+
+def test_image_job_invalidates_feeds(
+        mixer, user, published_category, django_capture_on_commit_callbacks
+):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category, image=""
+    )
+    post.image.save("feed.jpg", ContentFile(_image_bytes((800, 400))))
+    ImageJob.objects.enqueue(post)
+    scopes = (
+        INDEX_SCOPE,
+        category_scope(published_category.slug),
+        author_scope(user.username),
+    )
+    before = get_versions(*scopes)
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command("process_image_jobs", workers=0, stdout=StringIO())
+    after = get_versions(*scopes)
+    assert all(new > old for old, new in zip(before, after)), (
+        "Убедитесь, что запись копий изображения сбрасывает кеш главной,"
+        " ленты категории и страницы автора."
+    )
+
+
+def test_claim_skips_jobs_taken_by_another_worker(
+        mixer, user, published_category, monkeypatch
+):
+    posts = mixer.cycle(2).blend(
+        "blog.Post", author=user, category=published_category, image=""
+    )
+    for post in posts:
+        post.image.save("job.jpg", ContentFile(_image_bytes((800, 400))))
+    taken, free = [ImageJob.objects.enqueue(post) for post in posts]
+
+    def values_list(self, *fields, **kwargs):
+        ids = list(QuerySet.values_list(self, *fields, **kwargs))
+        # Другой обработчик берёт задачу между выборкой и UPDATE.
+        ImageJob.objects.filter(pk=taken.pk).update(
+            status=ImageJob.Status.RUNNING,
+            started_at=timezone.now() - timezone.timedelta(seconds=1),
+        )
+        return ids
+
+    monkeypatch.setattr(ImageJobQuerySet, "values_list", values_list)
+    assert ImageJob.objects.claim(10) == [free], (
+        "Убедитесь, что обработчик получает только задачи, которые он сам"
+        " перевёл в работу."
+    )
+    taken.refresh_from_db()
+    assert taken.attempts == 0
+
+
+def test_animated_image_has_no_variants(mixer, user, published_category):
+    frames = [Image.new("P", (800, 400), color) for color in (1, 2)]
+    buffer = BytesIO()
+    frames[0].save(buffer, "GIF", save_all=True, append_images=frames[1:])
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category, image=""
+    )
+    post.image.save("animated.gif", ContentFile(buffer.getvalue()))
+    ImageJob.objects.enqueue(post)
+    call_command("process_image_jobs", workers=0, stdout=StringIO())
+    post.refresh_from_db()
+    assert post.image_variants["variants"] == [], (
+        "Убедитесь, что для анимированных изображений не создаются"
+        " статичные копии."
+    )
+    assert post.image_srcset == f"{post.image.url} 800w"
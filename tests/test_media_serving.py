@@ -0,0 +1,84 @@
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.http import Http404
+
+from core.media import get_media_path
+from core.storage import hashed_storage
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("media_root")]
+
+CONTENT = b"0123456789" * 10
+
+
+@pytest.fixture
+def legacy_url():
+    FileSystemStorage().save("images/photo.jpg", ContentFile(CONTENT))
+    return "/media/images/photo.jpg"
+
+
+def _body(response):
+    return b"".join(response.streaming_content)
+
+
+def test_media_full_and_range_requests(client, legacy_url):
+    response = client.get(legacy_url)
+    assert response.status_code == 200
+    assert _body(response) == CONTENT
+    assert response["Accept-Ranges"] == "bytes"
+    assert response["Cache-Control"] == "public, max-age=3600"
+
+    response = client.get(legacy_url, HTTP_RANGE="bytes=10-19")
+    assert response.status_code == 206, (
+        "Убедитесь, что медиафайлы отдаются по частям по заголовку Range."
+    )
+    assert response["Content-Range"] == f"bytes 10-19/{len(CONTENT)}"
+    assert response["Content-Length"] == "10"
+    assert _body(response) == CONTENT[10:20]
+
+    response = client.get(legacy_url, HTTP_RANGE="bytes=-5")
+    assert _body(response) == CONTENT[-5:]
+    response = client.get(legacy_url, HTTP_RANGE="bytes=500-")
+    assert response.status_code == 416
+    assert response["Content-Range"] == f"bytes */{len(CONTENT)}"
+
+
+def test_media_conditional_requests(client, legacy_url):
+    etag = client.get(legacy_url)["ETag"]
+    response = client.get(legacy_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304, (
+        "Убедитесь, что медиафайлы поддерживают условные запросы."
+    )
+    response = client.get(
+        legacy_url, HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE='"other"'
+    )
+    assert response.status_code == 200 and _body(response) == CONTENT
+
+
+def test_hashed_media_is_immutable(client):
+    name = hashed_storage.save("images/photo.jpg", ContentFile(CONTENT))
+    response = client.get(f"/media/{name}")
+    assert response.status_code == 200
+    assert "immutable" in response["Cache-Control"], (
+        "Убедитесь, что файлы с именами по содержимому кешируются"
+        " навсегда."
+    )
+    assert response["ETag"].strip('"') in name
+
+
+def test_media_proxy_modes(client, settings, legacy_url, media_root):
+    settings.MEDIA_SERVE_MODE = "x-accel-redirect"
+    response = client.get(legacy_url)
+    assert response["X-Accel-Redirect"] == (
+        "/protected-media/images/photo.jpg"
+    )
+    assert response.content == b""
+    settings.MEDIA_SERVE_MODE = "x-sendfile"
+    response = client.get(legacy_url)
+    assert response["X-Sendfile"] == str(media_root / "images/photo.jpg")
+
+
+def test_media_outside_root_is_not_served(client, legacy_url):
+    with pytest.raises(Http404):
+        get_media_path("images/../../settings.py")
+    assert client.get("/media/images/").status_code == 404
@@ -0,0 +1,196 @@
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.utils import timezone
+from PIL import Image
+
+from blog.models import Post
+from core.cache import INDEX_SCOPE, author_scope, category_scope, get_versions
+from core.models import MediaBlob
+from core.storage import hashed_storage, is_hashed_name
+
+pytestmark = [pytest.mark.django_db, pytest.mark.usefixtures("media_root")]
+
+
+def _image(color):
+    buffer = BytesIO()
+    Image.new("RGB", (40, 20), color).save(buffer, "JPEG")
+    return ContentFile(buffer.getvalue())
+
+
+@pytest.fixture
+def make_post(mixer, user, published_category):
+    def make_post():
+        return mixer.blend(
+            "blog.Post", author=user, category=published_category, image=""
+        )
+    return make_post
+
+
+def test_identical_uploads_share_one_file(
+        make_post, django_capture_on_commit_callbacks
+):
+    first, second = make_post(), make_post()
+    first.image.save("photo.jpg", _image("red"))
+    second.image.save("copy.JPG", _image("red"))
+    name = first.image.name
+    assert second.image.name == name and is_hashed_name(name), (
+        "Убедитесь, что одинаковые загрузки хранятся одним файлом с"
+        " именем по содержимому."
+    )
+    assert name.split("/")[1:3] == [name.split("/")[3][:2],
+                                    name.split("/")[3][2:4]]
+    assert MediaBlob.objects.get(name=name).refcount == 2
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first.image.save("other.jpg", _image("blue"))
+    assert hashed_storage.exists(name)
+    with django_capture_on_commit_callbacks(execute=True):
+        second.delete()
+    assert not hashed_storage.exists(name), (
+        "Убедитесь, что файл удаляется, когда на него не остаётся ссылок."
+    )
+    assert not MediaBlob.objects.filter(name=name).exists()
+
+
+def test_migrate_media_storage(make_post):
+    legacy = FileSystemStorage()
+    posts = [make_post() for _ in range(3)]
+    for post, (name, color) in zip(posts, (
+        ("images/a.jpg", "red"), ("images/b.jpg", "red"),
+        ("images/c.jpg", "green"),
+    )):
+        legacy.save(name, _image(color))
+        Post.objects.filter(pk=post.pk).update(
+            image=name, image_variants={"source": name, "variants": []}
+        )
+
+    scopes = (
+        INDEX_SCOPE,
+        category_scope(posts[0].category.slug),
+        author_scope(posts[0].author.username),
+    )
+    before = get_versions(*scopes)
+    call_command("migrate_media_storage", stdout=StringIO())
+    assert all(new > old for old, new in zip(before, get_versions(*scopes))), (
+        "Убедитесь, что migrate_media_storage сбрасывает кеш лент с"
+        " перенесёнными изображениями."
+    )
+    names = dict(Post.objects.values_list("pk", "image"))
+    first, second, third = (names[post.pk] for post in posts)
+    assert first == second != third and is_hashed_name(first), (
+        "Убедитесь, что migrate_media_storage переносит изображения в"
+        " хранилище с именами по содержимому."
+    )
+    assert Post.objects.get(pk=posts[0].pk).image_variants["source"] == first
+    assert MediaBlob.objects.get(name=first).refcount == 2
+    assert legacy.exists("images/a.jpg"), (
+        "Убедитесь, что прежние файлы без --delete-old остаются."
+    )
+
+    call_command("migrate_media_storage", delete_old=True, stdout=StringIO())
+    assert not legacy.exists("images/a.jpg")
+    assert hashed_storage.exists(first) and hashed_storage.exists(third)
+
+
+def test_upload_survives_pending_purge(
+        make_post, django_capture_on_commit_callbacks
+):
+    first, second = make_post(), make_post()
+    first.image.save("photo.jpg", _image("red"))
+    name = first.image.name
+    with django_capture_on_commit_callbacks() as callbacks:
+        first.delete()
+    # Отложенное удаление выполняется, пока загрузку ещё не сохранили
+    # в посте.
+    assert hashed_storage.save("images/again.jpg", _image("red")) == name
+    for callback in callbacks:
+        callback()
+    second.image = name
+    second.save()
+    assert hashed_storage.exists(name), (
+        "Убедитесь, что отложенное удаление файла без ссылок не удаляет"
+        " файл, который тем временем загрузили снова."
+    )
+    assert MediaBlob.objects.get(name=name).refcount == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_upload_of_unsaved_post_is_released(published_category):
+    post = Post(
+        title="Без автора",
+        text="Текст.",
+        pub_date=timezone.now(),
+        category=published_category,
+        image=SimpleUploadedFile("photo.jpg", _image("red").read()),
+    )
+    with pytest.raises(IntegrityError):
+        post.save()
+    assert not MediaBlob.objects.exists()
+    assert not hashed_storage.exists(post.image.name), (
+        "Убедитесь, что файл поста, который не удалось сохранить,"
+        " удаляется."
+    )
+
+
+def test_recount_keeps_uploads_in_progress(make_post):
+    post = make_post()
+    post.image.save("photo.jpg", _image("red"))
+    name = hashed_storage.save("images/upload.jpg", _image("green"))
+    # Загрузка началась после начала пересчёта, пост ещё не сохранён.
+    MediaBlob.objects.filter(name=name).update(
+        created_at=timezone.now() + timezone.timedelta(minutes=1)
+    )
+    call_command("migrate_media_storage", delete_old=True, stdout=StringIO())
+    assert MediaBlob.objects.get(name=name).refcount == 1
+    assert hashed_storage.exists(name), (
+        "Убедитесь, что пересчёт ссылок не трогает файлы, загруженные"
+        " во время пересчёта."
+    )
+    assert MediaBlob.objects.get(name=post.image.name).refcount == 1
+
+
+def test_reupload_of_same_content_keeps_one_reference(
+        make_post, django_capture_on_commit_callbacks
+):
+    post = make_post()
+    post.image.save("photo.jpg", _image("red"))
+    post.image.save("again.jpg", _image("red"))
+    name = post.image.name
+    assert MediaBlob.objects.get(name=name).refcount == 1, (
+        "Убедитесь, что повторная загрузка того же содержимого в пост не"
+        " добавляет ссылку на файл."
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        post.delete()
+    assert not hashed_storage.exists(name)
+    assert not MediaBlob.objects.exists()
+
+
+def test_edit_with_same_image_is_not_requeued(user, user_client, make_post):
+    post = make_post()
+    post.image.save("photo.jpg", _image("red"))
+    Post.objects.filter(pk=post.pk).update(
+        image_variants={"source": post.image.name, "variants": []}
+    )
+    response = user_client.post(f"/posts/{post.pk}/edit/", {
+        "title": post.title,
+        "text": post.text,
+        "pub_date": post.pub_date.strftime("%Y-%m-%d %H:%M"),
+        "category": post.category_id,
+        "is_published": "on",
+        "image": SimpleUploadedFile(
+            "photo.jpg", _image("red").read(), content_type="image/jpeg"
+        ),
+    })
+    assert response.status_code == 302
+    assert MediaBlob.objects.get(name=post.image.name).refcount == 1
+    assert not post.image_jobs.exists(), (
+        "Убедитесь, что загрузка того же изображения не ставит задачу"
+        " создания копий."
+    )
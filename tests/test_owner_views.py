@@ -0,0 +1,65 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _lookups(client, url, table):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return [
+        query["sql"] for query in context.captured_queries
+        if f'FROM "{table}"' in query["sql"]
+    ]
+
+
+@pytest.mark.parametrize("action", ["edit", "delete"])
+def test_post_owner_check_is_one_lookup(
+        user_client, post_with_published_location, action
+):
+    url = f"/posts/{post_with_published_location.id}/{action}/"
+    assert len(_lookups(user_client, url, "blog_post")) == 1, (
+        "Убедитесь, что проверка автора и страница правки поста используют"
+        " один запрос поста."
+    )
+
+
+@pytest.mark.parametrize("action", ["edit_comment", "delete_comment"])
+def test_comment_owner_check_is_one_lookup(
+        mixer, user, user_client, post_with_published_location, action
+):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    url = f"/posts/{post.id}/{action}/{comment.id}/"
+    lookups = _lookups(user_client, url, "blog_comment")
+    assert len(lookups) == 1 and 'JOIN "blog_post"' in lookups[0], (
+        "Убедитесь, что комментарий выбирается одним запросом вместе с"
+        " постом."
+    )
+
+
+def test_comment_of_other_post_not_found(
+        mixer, user, user_client, post_with_published_location,
+        post_with_another_category
+):
+    comment = mixer.blend(
+        "blog.Comment", post=post_with_published_location, author=user
+    )
+    url = (
+        f"/posts/{post_with_another_category.id}/edit_comment/{comment.id}/"
+    )
+    assert user_client.get(url).status_code == 404
+
+
+def test_foreign_comment_redirects_to_post(
+        mixer, another_user_client, user, post_with_published_location
+):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    response = another_user_client.get(
+        f"/posts/{post.id}/edit_comment/{comment.id}/"
+    )
+    assert response.status_code == 302
+    assert response["Location"] == f"/posts/{post.id}/"
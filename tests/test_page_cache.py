@@ -0,0 +1,101 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context.captured_queries)
+
+
+def test_anonymous_index_is_cached(
+        unlogged_client, user_client, post_with_published_location
+):
+    assert _queries(unlogged_client, "/")
+    assert _queries(unlogged_client, "/") == 0, (
+        "Убедитесь, что главная страница для анонимов отдаётся из кеша."
+    )
+    assert _queries(user_client, "/"), (
+        "Убедитесь, что авторизованным пользователям страница из кеша"
+        " не отдаётся."
+    )
+
+
+def test_invalidation_is_targeted(
+        mixer, unlogged_client, another_user, post_with_published_location,
+        post_with_another_category, django_capture_on_commit_callbacks
+):
+    post = post_with_published_location
+    own_url = f"/category/{post.category.slug}/"
+    other_url = f"/category/{post_with_another_category.category.slug}/"
+    for url in ("/", own_url, other_url):
+        _queries(unlogged_client, url)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        mixer.blend("blog.Comment", post=post, author=another_user)
+
+    assert _queries(unlogged_client, "/"), (
+        "Убедитесь, что новый комментарий сбрасывает кеш главной страницы."
+    )
+    assert _queries(unlogged_client, own_url), (
+        "Убедитесь, что новый комментарий сбрасывает кеш ленты категории"
+        " поста."
+    )
+    assert _queries(unlogged_client, other_url) == 0, (
+        "Убедитесь, что изменения поста не сбрасывают кеш лент других"
+        " категорий."
+    )
+    assert "(1)" in unlogged_client.get(own_url).content.decode("utf-8")
+
+
+def test_category_change_purges_both_categories(
+        unlogged_client, post_with_published_location,
+        post_with_another_category, django_capture_on_commit_callbacks
+):
+    post = post_with_published_location
+    old_url = f"/category/{post.category.slug}/"
+    new_category = post_with_another_category.category
+    new_url = f"/category/{new_category.slug}/"
+    for url in (old_url, new_url):
+        _queries(unlogged_client, url)
+
+    post.category = new_category
+    with django_capture_on_commit_callbacks(execute=True):
+        post.save()
+
+    assert _queries(unlogged_client, old_url)
+    assert _queries(unlogged_client, new_url)
+
+
+def test_purge_waits_for_commit(
+        unlogged_client, post_with_published_location,
+        django_capture_on_commit_callbacks
+):
+    _queries(unlogged_client, "/")
+    post = post_with_published_location
+    post.title = "Новый заголовок"
+    with django_capture_on_commit_callbacks() as callbacks:
+        post.save()
+    assert _queries(unlogged_client, "/") == 0, (
+        "Убедитесь, что кеш сбрасывается после фиксации транзакции, а не"
+        " внутри неё."
+    )
+    for callback in callbacks:
+        callback()
+    assert _queries(unlogged_client, "/")
+
+
+def test_unrelated_query_parameters_share_the_cached_page(
+        unlogged_client, many_posts_with_published_locations
+):
+    _queries(unlogged_client, "/")
+    assert _queries(unlogged_client, "/?utm_source=feed&x=1") == 0, (
+        "Убедитесь, что параметры, не влияющие на страницу, не создают"
+        " новых записей кеша."
+    )
+    assert _queries(unlogged_client, "/?page=2&x=1")
+    assert _queries(unlogged_client, "/?x=2&page=2") == 0
@@ -0,0 +1,50 @@
+import pytest
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _card_key(post):
+    post.refresh_from_db()
+    return make_template_fragment_key(
+        "post_card", [post.id, post.updated_at.timestamp()]
+    )
+
+
+def test_card_fragment_cached_per_version(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    user_client.get("/")
+    assert caches["default"].get(_card_key(post)), (
+        "Убедитесь, что карточка поста кешируется по id и версии поста."
+    )
+
+    post.title = "Новый заголовок карточки"
+    post.save()
+    assert caches["default"].get(_card_key(post)) is None
+    assert post.title in user_client.get("/").content.decode("utf-8")
+
+
+def test_related_changes_refresh_card(
+        user, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    url = f"/profile/{user.username}/"
+    user_client.get(url)
+
+    category = post.category
+    category.title = "Переименованная категория"
+    category.save()
+    location = post.location
+    location.name = "Переименованное место"
+    location.save()
+
+    content = user_client.get(url).content.decode("utf-8")
+    assert category.title in content, (
+        "Убедитесь, что изменение категории обновляет карточки её постов."
+    )
+    assert location.name in content, (
+        "Убедитесь, что изменение местоположения обновляет карточки постов."
+    )
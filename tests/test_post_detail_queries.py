@@ -0,0 +1,25 @@
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_post_detail_costs_two_queries(
+        mixer, unlogged_client, another_user, post_with_published_location,
+        django_assert_num_queries
+):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post, author=another_user)
+    # Пост с категорией, местоположением и автором и его комментарии.
+    with django_assert_num_queries(2):
+        response = unlogged_client.get(f"/posts/{post.id}/")
+    assert response.status_code == 200
+
+
+def test_hidden_post_detail(
+        user_client, another_user_client, future_posts
+):
+    url = f"/posts/{future_posts[0].id}/"
+    assert user_client.get(url).status_code == 200, (
+        "Убедитесь, что автор видит страницу своего отложенного поста."
+    )
+    assert another_user_client.get(url).status_code == 404
@@ -0,0 +1,39 @@
+import pytest
+from conftest import N_PER_PAGE
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_profile_limits_posts_in_database(
+        user, another_user_client, many_posts_with_published_locations
+):
+    url = f"/profile/{user.username}/"
+    with CaptureQueriesContext(connection) as context:
+        response = another_user_client.get(url)
+    assert len(response.context["page_obj"]) == N_PER_PAGE
+
+    post_queries = [
+        query["sql"] for query in context.captured_queries
+        if 'FROM "blog_post"' in query["sql"]
+        and "COUNT(" not in query["sql"]
+    ]
+    assert len(post_queries) == 1
+    assert f"LIMIT {N_PER_PAGE}" in post_queries[0], (
+        "Убедитесь, что посты страницы пользователя выбираются запросом с"
+        " LIMIT, а не загружаются в память целиком."
+    )
+
+
+def test_profile_visibility(
+        user, user_client, another_user_client, future_posts
+):
+    url = f"/profile/{user.username}/"
+    assert len(user_client.get(url).context["page_obj"]), (
+        "Убедитесь, что автор видит на своей странице отложенные посты."
+    )
+    assert not len(another_user_client.get(url).context["page_obj"]), (
+        "Убедитесь, что другие пользователи не видят отложенные посты"
+        " автора."
+    )
@@ -0,0 +1,70 @@
+import pytest
+from core.middleware import (STATS_KEY, STATS_WORKERS_KEY,
+                             QueryBudgetExceeded, query_stats)
+from django.core.cache import caches
+from django.test import override_settings
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_budget_exceeded_raises(unlogged_client, post_with_published_location):
+    with override_settings(QUERY_BUDGETS={"blog:index": 0}):
+        with pytest.raises(QueryBudgetExceeded):
+            unlogged_client.get("/")
+
+
+def test_budget_exceeded_logs(
+        caplog, unlogged_client, post_with_published_location
+):
+    with override_settings(
+        QUERY_BUDGETS={"blog:index": 0}, QUERY_BUDGET_RAISE=False
+    ):
+        assert unlogged_client.get("/").status_code == 200
+    assert "blog:index" in caplog.text, (
+        "Убедитесь, что без QUERY_BUDGET_RAISE превышение бюджета"
+        " записывается в лог."
+    )
+
+
+def test_stats_endpoint(
+        mixer, client, user_client, post_with_published_location
+):
+    query_stats.reset()
+    user_client.get(f"/posts/{post_with_published_location.id}/")
+
+    assert user_client.get("/stats/queries/").status_code == 302, (
+        "Убедитесь, что сводка запросов доступна только персоналу."
+    )
+    client.force_login(mixer.blend("auth.User", is_staff=True))
+    summary = client.get("/stats/queries/").json()
+    detail = summary["blog:post_detail"]
+    assert detail["requests"] == 1
+    assert detail["max_queries"] <= detail["budget"]
+    assert detail["slowest_sql"]
+
+
+def test_stats_endpoint_sums_all_workers(
+        mixer, client, post_with_published_location
+):
+    query_stats.reset()
+    client.force_login(mixer.blend("auth.User", is_staff=True))
+    client.get(f"/posts/{post_with_published_location.id}/")
+    # Счётчики другого воркера, записанные им в общий кеш.
+    cache = caches["default"]
+    cache.set(STATS_WORKERS_KEY, [
+        *cache.get(STATS_WORKERS_KEY, []), "other-host:1"
+    ])
+    cache.set(STATS_KEY.format(worker="other-host:1"), {
+        "blog:post_detail": {
+            "requests": 3, "queries": 30, "max_queries": 12,
+            "sql_ms": 3.0, "slowest_ms": 1000.0,
+            "slowest_sql": "SELECT 1", "over_budget": 3,
+        },
+    })
+    detail = client.get("/stats/queries/").json()["blog:post_detail"]
+    assert detail["requests"] == 4, (
+        "Убедитесь, что сводка запросов складывает счётчики всех"
+        " процессов."
+    )
+    assert (detail["max_queries"], detail["over_budget"]) == (12, 3)
+    assert detail["slowest_sql"] == "SELECT 1"
@@ -0,0 +1,66 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _view_queryset(view_class, user, **kwargs):
+    request = RequestFactory().get("/")
+    request.user = user
+    view = view_class()
+    view.setup(request, **kwargs)
+    return view.get_queryset()
+
+
+def _assert_uses_index(name, query_set, table):
+    plan = query_set.explain()
+    assert "TEMP B-TREE" not in plan, (
+        f"Запрос `{name}` сортирует строки во временном B-дереве вместо"
+        f" обхода индекса:\n{plan}"
+    )
+    table_steps = [
+        line for line in plan.splitlines() if f" {table} " in f"{line} "
+    ]
+    assert table_steps, plan
+    for line in table_steps:
+        assert "INDEX" in line, (
+            f"Запрос `{name}` читает таблицу `{table}` полным просмотром:"
+            f"\n{plan}"
+        )
+
+
+def test_hot_queries_use_indexes(user, many_posts_with_published_locations):
+    from blog.models import Comment
+    from blog.views import (CategoryPostListView, MainPostListView,
+                            UserPostsListView)
+    from core.paginator import CursorPaginator, encode_cursor
+
+    post = many_posts_with_published_locations[0]
+    anonymous = AnonymousUser()
+    feeds = {
+        "index": _view_queryset(MainPostListView, anonymous),
+        "category": _view_queryset(
+            CategoryPostListView, anonymous,
+            category_slug=post.category.slug,
+        ),
+        "profile": _view_queryset(
+            UserPostsListView, anonymous, username=user.username
+        ),
+    }
+    for name, query_set in feeds.items():
+        _assert_uses_index(name, query_set[:10], "blog_post")
+        cursor = encode_cursor(post)
+        paginator = CursorPaginator(query_set, 10)
+        _assert_uses_index(
+            f"{name} after", paginator.get_queryset(after=cursor)[:11],
+            "blog_post",
+        )
+        _assert_uses_index(
+            f"{name} before", paginator.get_queryset(before=cursor)[:11],
+            "blog_post",
+        )
+
+    _assert_uses_index(
+        "comments", Comment.objects.filter(post=post), "blog_comment"
+    )
@@ -0,0 +1,115 @@
+import re
+
+import pytest
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.search_sql import SEARCH_TRIGGERS
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _titles(response):
+    return [post.title for post in response.context["page_obj"]]
+
+
+def test_search_finds_visible_posts_by_relevance(
+        mixer, user, client, published_category
+):
+    in_title = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        title="Обед у Морозовой", text="Были гости.",
+    )
+    in_text = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        title="Вечер", text="После обеда гуляли, потом снова обед.",
+    )
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        title="Тайный обед", text="Не опубликован.", is_published=False,
+    )
+    response = client.get("/search/", {"q": "обед"})
+    assert _titles(response) == [in_title.title, in_text.title], (
+        "Убедитесь, что поиск показывает только опубликованные посты, а"
+        " совпадения в заголовке идут первыми."
+    )
+
+
+def test_search_index_follows_post_changes(
+        client, post_with_published_location
+):
+    post = post_with_published_location
+    post.title = "Зеленоградский ужин"
+    post.save()
+    assert _titles(client.get("/search/", {"q": "зеленоград"})) == [
+        post.title
+    ], "Убедитесь, что индекс поиска обновляется при сохранении поста."
+    post.delete()
+    assert not _titles(client.get("/search/", {"q": "зеленоград"}))
+
+
+def test_search_query_is_escaped(client, post_with_published_location):
+    response = client.get("/search/", {"q": '" OR title:* NEAR('})
+    assert response.status_code == 200
+    assert client.get("/search/").status_code == 200
+
+
+def test_admin_search_uses_index(
+        admin_client, post_with_published_location
+):
+    with CaptureQueriesContext(connection) as context:
+        response = admin_client.get("/admin/blog/post/", {"q": "пост"})
+    assert response.status_code == 200
+    queries = " ".join(query["sql"] for query in context.captured_queries)
+    assert "MATCH" in queries and "LIKE" not in queries, (
+        "Убедитесь, что поиск в админке использует полнотекстовый индекс."
+    )
+
+
+def _search_triggers():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+        )
+        return {name for name, in cursor.fetchall()} & set(SEARCH_TRIGGERS)
+
+
+def test_search_triggers_exist_after_migrate():
+    assert _search_triggers() == set(SEARCH_TRIGGERS), (
+        "Убедитесь, что после всех миграций триггеры индекса поиска на"
+        " месте."
+    )
+
+
+def test_migrate_restores_lost_search_triggers(
+        client, post_with_published_location
+):
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TRIGGER blog_post_search_insert")
+        cursor.execute("DROP TRIGGER blog_post_search_update")
+    post = post_with_published_location
+    post.title = "Зеленоградский ужин"
+    post.save()
+    emit_post_migrate_signal(verbosity=0, interactive=False, db="default")
+    assert _search_triggers() == set(SEARCH_TRIGGERS), (
+        "Убедитесь, что migrate восстанавливает пропавшие триггеры"
+        " индекса поиска."
+    )
+    assert _titles(client.get("/search/", {"q": "зеленоград"})) == [
+        post.title
+    ]
+
+
+def test_search_results_link_to_next_page(
+        mixer, user, client, published_category
+):
+    mixer.cycle(11).blend(
+        "blog.Post", author=user, category=published_category,
+        title="Обед", text="Текст.",
+    )
+    content = client.get("/search/", {"q": "обед"}).content.decode()
+    assert re.search(r'&amp;page=2">\s*>>', content), (
+        "Убедитесь, что у результатов поиска есть ссылка на следующую"
+        " страницу."
+    )
@@ -0,0 +1,52 @@
+import io
+import json
+from collections import Counter
+
+import pytest
+from core.management.commands.stream_loaddata import iter_json_array
+from django.apps import apps
+from django.conf import settings
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+FIXTURE = settings.BASE_DIR / ".." / "db.json"
+
+
+def test_iter_json_array_matches_json_load():
+    items = [{"pk": number, "text": "ё" * number} for number in range(50)]
+    document = json.dumps(items, ensure_ascii=False, indent=2)
+    assert list(iter_json_array(io.StringIO(document), chunk_size=7)) == (
+        items
+    ), "Убедитесь, что потоковый разбор фикстуры не теряет объекты."
+
+
+def test_stream_loaddata_loads_fixture():
+    from blog.models import Post
+
+    call_command(
+        "stream_loaddata", str(FIXTURE), batch_size=5, transaction_size=20,
+        stdout=io.StringIO(),
+    )
+    with open(FIXTURE, encoding="utf-8") as fixture:
+        expected = Counter(
+            item["model"] for item in json.load(fixture)
+            # Права создаются миграциями и уже есть в базе.
+            if item["model"] != "auth.permission"
+        )
+    for label, count in expected.items():
+        model = apps.get_model(label)
+        assert model.objects.count() == count, (
+            f"Убедитесь, что загружены все объекты модели {label}."
+        )
+    for post in Post.objects.select_related("category"):
+        assert post.excerpt == post.make_excerpt()
+        assert post.is_visible == post.check_visibility(), (
+            "Убедитесь, что после загрузки пересчитывается видимость постов."
+        )
+
+    call_command("stream_loaddata", str(FIXTURE), stdout=io.StringIO())
+    assert Post.objects.count() == expected["blog.post"], (
+        "Убедитесь, что повторная загрузка перезаписывает объекты, а не"
+        " дублирует их."
+    )
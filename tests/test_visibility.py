@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _index_ids(client):
+    return [post.id for post in client.get("/").context["page_obj"]]
+
+
+def test_scheduled_post_published_by_command(
+        unlogged_client, post_with_published_location,
+        django_capture_on_commit_callbacks
+):
+    from blog.models import Post
+    from core.signals import post_visibility_changed
+
+    post = post_with_published_location
+    post.pub_date = timezone.now() + timedelta(days=1)
+    with django_capture_on_commit_callbacks(execute=True):
+        post.save()
+    assert not post.is_visible
+    assert post.id not in _index_ids(unlogged_client)
+
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1)
+    )
+    events = []
+
+    def receiver(sender, post_ids, visible, **kwargs):
+        events.append((post_ids, visible))
+
+    post_visibility_changed.connect(receiver)
+    try:
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command("publish_scheduled")
+    finally:
+        post_visibility_changed.disconnect(receiver)
+
+    post.refresh_from_db()
+    assert post.is_visible, (
+        "Убедитесь, что команда publish_scheduled открывает отложенные"
+        " посты, время публикации которых наступило."
+    )
+    assert events == [([post.id], True)]
+    assert post.id in _index_ids(unlogged_client)
+
+
+def test_category_publication_updates_posts(
+        unlogged_client, post_with_published_location
+):
+    post = post_with_published_location
+    category = post.category
+    category.is_published = False
+    category.save()
+    post.refresh_from_db()
+    assert not post.is_visible, (
+        "Убедитесь, что снятие категории с публикации скрывает её посты."
+    )
+
+    category.is_published = True
+    category.save()
+    post.refresh_from_db()
+    assert post.is_visible
+    assert post.id in _index_ids(unlogged_client)
+
+
+def test_category_delete_hides_posts(post_with_published_location):
+    post = post_with_published_location
+    post.category.delete()
+    post.refresh_from_db()
+    assert post.category is None
+    assert not post.is_visible